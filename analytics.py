@@ -0,0 +1,290 @@
+"""Cross-sectional statistics over many symbols: correlation, covariance, beta and portfolio volatility.
+
+Closes are aligned onto the symbols' shared calendar in one pass and turned
+into a (n_obs, n_symbols) matrix of returns, NaN where a symbol has no bar.
+Covariances are pairwise-complete: each pair uses the bars where both symbols
+traded, like ``DataFrame.cov``. The windowed sums behind them are updated
+incrementally, so a new bar costs one O(n_symbols^2) update instead of a pass
+over the window.
+
+    python analytics.py --csv finageninsights/finageninsights-main/updated_file.csv --window 60
+"""
+import argparse
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from indicators import align_closes
+
+# Bars per year used to annualize volatility, by series type
+PERIODS_PER_YEAR = {"Daily": 252, "Weekly": 52, "Monthly": 12}
+
+CACHE_SIZE = 16
+
+
+# Function to align closes of many frames and return (index, symbols, returns) with returns shaped (n_obs - 1, n_symbols)
+def aligned_returns(frames, column="Close", log=False):
+    index, symbols, closes = align_closes(frames, column)
+    closes = closes.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(closes), axis=0) if log else closes[1:] / closes[:-1] - 1
+    return index[1:], symbols, returns
+
+
+class RollingMoments:
+    """Pairwise-complete first and second moments over the last ``window`` rows.
+
+    Keeps, for every pair (i, j), the sums over rows where both are present:
+    sum of x_i, of x_i^2, of x_i * x_j and the row count. Pushing rows adds
+    them and subtracts the rows that leave the window, both as matrix products.
+    Instances are never modified: ``push`` returns new moments, so readers
+    sharing an instance with a writer never see half-updated sums.
+    """
+
+    def __init__(self, n_series, window):
+        self.window = window
+        self._rows = np.empty((0, n_series))
+        shape = (n_series, n_series)
+        # Sums of x_i * x_j, x_i, x_i^2 and the row count
+        self._sums = tuple(np.zeros(shape) for _ in range(4))
+
+    @staticmethod
+    def _add(sums, rows, sign):
+        present = (~np.isnan(rows)).astype(np.float64)
+        values = np.nan_to_num(rows)
+        terms = (values.T @ values, values.T @ present, (values * values).T @ present, present.T @ present)
+        return tuple(total + sign * term for total, term in zip(sums, terms))
+
+    # Function to slide the window over new rows shaped (k, n_series), returns the moments of the new window
+    def push(self, rows):
+        rows = np.asarray(rows, dtype=np.float64)
+        moments = copy.copy(self)
+        if len(rows) >= self.window:
+            # The whole window is new, start the sums over rather than adding and removing
+            moments._rows = rows[-self.window:].copy()
+            moments._sums = self._add(tuple(np.zeros_like(total) for total in self._sums), moments._rows, 1.0)
+            return moments
+
+        leaving = max(0, len(self._rows) + len(rows) - self.window)
+        sums = self._sums
+        if leaving:
+            sums = self._add(sums, self._rows[:leaving], -1.0)
+        moments._sums = self._add(sums, rows, 1.0)
+        moments._rows = np.concatenate([self._rows[leaving:], rows])
+        return moments
+
+    @property
+    def counts(self):
+        return self._sums[3]
+
+    def cov(self, min_periods=2):
+        xx, xm, _, n = self._sums
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (xx - xm * xm.T / n) / (n - 1)
+        return np.where(n >= min_periods, cov, np.nan)
+
+    # Variance of series i over the rows shared with series j, the denominator of corr and beta
+    def paired_var(self, min_periods=2):
+        _, xm, x2m, n = self._sums
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (x2m - xm * xm / n) / (n - 1)
+        return np.where(n >= min_periods, np.maximum(var, 0.0), np.nan)
+
+    def corr(self, min_periods=2):
+        var = self.paired_var(min_periods)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.cov(min_periods) / np.sqrt(var * var.T)
+        return np.clip(corr, -1.0, 1.0)
+
+
+# Function to compute the rolling correlation of two return series in one pass over cumulative sums
+def rolling_pair_corr(x, y, window, min_periods=2):
+    present = ~(np.isnan(x) | np.isnan(y))
+    x, y = np.where(present, x, 0.0), np.where(present, y, 0.0)
+
+    def window_sum(values):
+        total = np.concatenate([[0.0], np.cumsum(values)])
+        return total[window:] - total[:-window]
+
+    n = window_sum(present.astype(np.float64))
+    sx, sy, sxy = window_sum(x), window_sum(y), window_sum(x * y)
+    sxx, syy = window_sum(x * x), window_sum(y * y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        corr = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+    return np.where(n >= min_periods, np.clip(corr, -1.0, 1.0), np.nan)
+
+
+# Function to compute the volatility of weighted portfolios from a covariance matrix, weights shaped (n,) or (k, n)
+def portfolio_volatility(cov, weights, periods_per_year=None):
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    variance = np.einsum("ki,ij,kj->k", weights, cov, weights)
+    volatility = np.sqrt(np.maximum(variance, 0.0))
+    if periods_per_year:
+        volatility = volatility * np.sqrt(periods_per_year)
+    return volatility if len(volatility) > 1 else volatility[0]
+
+
+class CrossSection:
+    """Returns and windowed moments for a universe of symbols; subsets are answered by slicing.
+
+    Pairwise statistics of two symbols do not depend on the rest of the
+    universe, so any subset reads its rows and columns out of the universe's
+    matrices. ``extend`` slides the window over bars appended since.
+    """
+
+    def __init__(self, frames, window=60):
+        self.window = window
+        self.index, self.symbols, self.returns = aligned_returns(frames)
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.moments = RollingMoments(len(self.symbols), window).push(self.returns)
+        self.versions = _versions(frames)
+
+    # Function to tell whether frames for some of the symbols are the series this section was built from
+    def matches(self, frames):
+        return all(self.versions.get(symbol) == version for symbol, version in _versions(frames).items())
+
+    def positions(self, symbols):
+        return [self._positions[symbol] for symbol in symbols]
+
+    # Function to take in the frames again; only the bars after the last one seen are aligned and pushed
+    # Returns False when a series changed in any other way, and the caller should rebuild
+    def extend(self, frames):
+        versions = _versions(frames)
+        if versions == self.versions:
+            return True
+        if set(versions) != set(self.versions):
+            return False
+
+        tails = {}
+        for symbol, (rows, last_date) in self.versions.items():
+            df = frames[symbol]
+            if len(df) < rows or (rows and df.index[rows - 1] != last_date):
+                return False
+            # The last bar already seen is the base of the first new return
+            tails[symbol] = df.iloc[max(rows - 1, 0):]
+
+        index, _, returns = aligned_returns({symbol: tails[symbol] for symbol in self.symbols})
+        new = index > self.index[-1] if len(self.index) else np.ones(len(index), dtype=bool)
+        # New moments are swapped in whole, sessions reading this section keep a consistent window
+        self.moments = self.moments.push(returns[new])
+        self.index = self.index.append(index[new])
+        self.returns = np.concatenate([self.returns, returns[new]])
+        self.versions = versions
+        return True
+
+    def cov(self, symbols=None):
+        return self._select(self.moments.cov(), symbols)
+
+    def corr(self, symbols=None):
+        return self._select(self.moments.corr(), symbols)
+
+    # Function to compute each symbol's beta against the benchmark over the shared bars of the window
+    def betas(self, benchmark, symbols=None):
+        b = self._positions[benchmark]
+        moments = self.moments
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = moments.cov()[:, b] / moments.paired_var()[b, :]
+        return beta if symbols is None else beta[self.positions(symbols)]
+
+    def volatility(self, symbols=None, periods_per_year=None):
+        vol = np.sqrt(np.diag(self.moments.cov()))
+        if periods_per_year:
+            vol = vol * np.sqrt(periods_per_year)
+        return vol if symbols is None else vol[self.positions(symbols)]
+
+    # Function to compute the volatility of a portfolio over symbols, equal-weighted when weights are not given
+    def portfolio_volatility(self, symbols=None, weights=None, periods_per_year=None):
+        symbols = list(symbols) if symbols is not None else self.symbols
+        if weights is None:
+            weights = np.full(len(symbols), 1.0 / len(symbols))
+        return portfolio_volatility(self.cov(symbols), weights, periods_per_year)
+
+    def rolling_corr(self, first, second):
+        i, j = self.positions([first, second])
+        return rolling_pair_corr(self.returns[:, i], self.returns[:, j], self.window)
+
+    def _select(self, matrix, symbols):
+        if symbols is None:
+            return matrix
+        positions = self.positions(symbols)
+        return matrix[np.ix_(positions, positions)]
+
+
+# Function to summarise the frames a cross-section was built from, to tell new bars from a rewritten history
+def _versions(frames):
+    return {symbol: (len(df), df.index[-1] if len(df) else None) for symbol, df in frames.items()}
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# Function to return a CrossSection for the frames. The cached section for the same symbols is
+# slid forward when their series only gained bars; a cached wider universe built from the very
+# same series answers a subset without any recomputation
+def get_cross_section(frames, window=60):
+    symbols = frozenset(frames)
+    with _cache_lock:
+        for (cached_symbols, cached_window), section in reversed(_cache.items()):
+            if cached_window != window or not symbols <= cached_symbols:
+                continue
+            if section.matches(frames) or (symbols == cached_symbols and section.extend(frames)):
+                _cache.move_to_end((cached_symbols, cached_window))
+                return section
+
+    section = CrossSection(frames, window)
+    with _cache_lock:
+        _cache[(symbols, window)] = section
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return section
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="history in the updated_file.csv layout; without it the series are fetched from the API")
+    parser.add_argument("--symbols", help="comma-separated symbols (or companies with --csv), default all")
+    parser.add_argument("--series", default="Weekly", choices=["Daily", "Weekly", "Monthly"])
+    parser.add_argument("--window", type=int, default=60, help="bars in the rolling window")
+    parser.add_argument("--benchmark", help="symbol to compute betas against, default the first one")
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",")] if args.symbols else None
+    if args.csv:
+        from backtest import load_history_csv
+
+        frames = load_history_csv(args.csv, symbols)
+        periods_per_year = PERIODS_PER_YEAR["Daily"]
+    else:
+        from api import company_symbol_mapping
+        from market_data import fetch_many
+        from data_processing import convert_to_dataframe
+
+        frames = {}
+        for symbol, time_series, error in fetch_many(symbols or company_symbol_mapping.values(), args.series):
+            if time_series:
+                frames[symbol] = convert_to_dataframe(time_series)
+            else:
+                print(f"{symbol:<8} fetch failed: {error}")
+        periods_per_year = PERIODS_PER_YEAR[args.series]
+
+    section = get_cross_section(frames, args.window)
+    benchmark = args.benchmark or section.symbols[0]
+    print(f"{len(section.symbols)} symbols, {len(section.index)} returns, window {args.window}, betas against {benchmark}")
+
+    betas, volatility = section.betas(benchmark), section.volatility(periods_per_year=periods_per_year)
+    for symbol, beta, vol in zip(section.symbols, betas, volatility):
+        print(f"{symbol[:28]:<28} beta {beta:6.2f}  volatility {vol:6.1%}")
+    print(f"equal-weight portfolio volatility {section.portfolio_volatility(periods_per_year=periods_per_year):.1%}")
+
+    corr = section.corr()
+    if len(section.symbols) <= 12:
+        for symbol, row in zip(section.symbols, corr):
+            print(f"{symbol[:28]:<28} " + " ".join(f"{value:6.2f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,50 @@
 import streamlit as st
-from api import fetch_stock_data
-from data_processing import convert_to_dataframe, predict_trend
-from visualization import plot_stock_data
-
-# Expanded company name to stock symbol mapping
-company_symbol_mapping = {
-    "Netflix": "NFLX", "Apple": "AAPL", "Microsoft": "MSFT", "Amazon": "AMZN",
-    "Google": "GOOGL", "Facebook": "META", "Tesla": "TSLA", "Nvidia": "NVDA",
-    "Intel": "INTC", "IBM": "IBM", "Twitter": "TWTR", "Salesforce": "CRM",
-    "Adobe": "ADBE", "Zoom": "ZM", "PayPal": "PYPL", "Snap": "SNAP",
-    "Uber": "UBER", "Airbnb": "ABNB", "Spotify": "SPOT", "Slack": "WORK",
-    "Shopify": "SHOP", "Alibaba": "BABA", "Tencent": "TCEHY", "Baidu": "BIDU",
-    "JD.com": "JD", "Sina": "SINA", "Etsy": "ETSY", "Square": "SQ",
-    "Palantir": "PLTR", "Roku": "ROKU", "DocuSign": "DOCU", "Twilio": "TWLO",
-    "Atlassian": "TEAM", "Zillow": "Z", "DraftKings": "DKNG", "Pinterest": "PINS",
-    "Xiaomi": "XIACF", "Lyft": "LYFT", "Moderna": "MRNA", "Johnson & Johnson": "JNJ",
-    "Pfizer": "PFE", "Merck": "MRK", "Roche": "RHHBY", "Novartis": "NVS",
-    "AstraZeneca": "AZN", "Gilead": "GILD", "Bristol-Myers Squibb": "BMY",
-    "Amgen": "AMGN", "Eli Lilly": "LLY", "GlaxoSmithKline": "GSK", "Sanofi": "SNY",
-    "Abbott": "ABT", "Thermo Fisher": "TMO", "GE Healthcare": "GEHC",
-    "Siemens Healthineers": "SMMNY", "Medtronic": "MDT", "Boston Scientific": "BSX",
-    "Stryker": "SYK", "Zimmer Biomet": "ZBH", "Dexcom": "DXCM", "Intuitive Surgical": "ISRG",
-    "Align Technology": "ALGN", "Edwards Lifesciences": "EW", "Hologic": "HOLX",
-    "Varian": "VAR", "Illumina": "ILMN", "NantKwest": "NK", "Bluebird Bio": "BLUE",
-    "Sarepta Therapeutics": "SRPT", "CRISPR Therapeutics": "CRSP", "CrowdStrike": "CRWD",
-    "Nutanix": "NTNX", "Elastic": "ESTC", "Snowflake": "SNOW", "HashiCorp": "HCP",
-    "Okta": "OKTA", "ServiceNow": "NOW"
-}
+from data_processing import convert_to_dataframe, frame_cache, predict_trend
+from forecast_engines import ENGINE_CHOICES
+from indicators import GROUPS, REGRESSOR_CHOICES
+from market_data import fetch_cached, prefetcher, request_scheduler
+from metrics import span
+from prefetch import traffic
+from symbols import SEARCH_LIMIT, get_symbol_index
+from visualization import plot_forecast, plot_stock_data
+
+# Listings from the symbol master file, loaded once per process
+symbol_index = get_symbol_index()
+company_symbol_mapping = symbol_index.mapping
+
+# Function to fetch stock data, served from the local cache while it is fresh
+def fetch_stock_data(symbol, time_series_type, interval=None):
+    traffic.record(symbol, time_series_type, interval)
+    with span("fetch", series=time_series_type):
+        time_series, error, stale = fetch_cached(symbol, time_series_type, interval)
+    if stale:
+        st.warning(f"{error} Showing cached data.")
+    elif error:
+        st.error(error)
+    return time_series
+
+# Function to show the request scheduler's queue and quota usage
+def show_api_stats():
+    with st.sidebar.expander("API quota"):
+        st.json(request_scheduler.stats())
+        prefetch_stats = prefetcher.stats()
+        if prefetch_stats["running"]:
+            st.json(prefetch_stats)
+    with st.sidebar.expander("Shared data"):
+        st.json(frame_cache.memory_report())
 
 def main():
     st.title("Stock Prediction App")
+    show_api_stats()
+
+    search_term = st.text_input("Search for a Company", "")
+    companies = dict(symbol_index.search(search_term, k=SEARCH_LIMIT)) if search_term else company_symbol_mapping
+    if not companies:
+        st.warning("No companies match your search term. Please try another term.")
+        return
 
-    company = st.selectbox("Select Company", list(company_symbol_mapping.keys()))
-    symbol = company_symbol_mapping[company]
+    company = st.selectbox("Select Company", list(companies.keys()))
+    symbol = companies[company]
 
     time_series_type = st.selectbox("Select Time Series Type", ["Intraday", "Weekly", "Monthly"])
     
@@ -46,13 +58,24 @@ def main():
     if time_series:
         df = convert_to_dataframe(time_series)
         
-        plot_stock_data(df, symbol)
+        indicators = st.multiselect("Indicators", list(GROUPS))
+        plot_stock_data(df, symbol, indicators=indicators, cache_key=(symbol, time_series_type, interval))
         
         period = st.slider("Select Forecast Period (days)", min_value=1, max_value=365, value=30)
         freq = st.selectbox("Select Forecast Frequency", ["D", "W", "M"])
+        engine = st.selectbox("Select Forecast Engine", ENGINE_CHOICES)
+        regressors = ()
+        if engine == "prophet":
+            regressors = st.multiselect("Indicators as Prophet regressors", REGRESSOR_CHOICES)
+        traffic.record_forecast(symbol, time_series_type, period, freq, engine, regressors, interval)
         
-        trend = predict_trend(df, period, freq)
-        st.write(f"The predicted trend for the next {period} {freq} is: {trend}")
+        result = predict_trend(df, period, freq, symbol=symbol, series_type=time_series_type, engine=engine,
+                               regressors=regressors, interval=interval)
+        if regressors and not result.regressors:
+            st.warning(f"Only {len(df)} bars, too few for the indicators' warm-up; forecasting from the price alone.")
+        if st.checkbox("Show forecast chart", value=True):
+            plot_forecast(df, result, symbol)
+        st.write(f"The predicted trend for the next {period} {freq} is: {result.direction}")
 
 if __name__ == "__main__":
     main()
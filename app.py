@@ -1,203 +1,54 @@
 import streamlit as st
-import http.client
-import pandas as pd
-import plotly.graph_objs as go
-from prophet import Prophet
-import json
 import warnings
+from analytics import PERIODS_PER_YEAR, get_cross_section
+from api import fetch_stock_data, show_api_stats
+from data_processing import convert_to_dataframe, predict_trend as forecast_trend
+from forecast_engines import ENGINE_CHOICES
+from indicators import GROUPS
+from market_data import fetch_many
+from prefetch import traffic
+from symbols import SEARCH_LIMIT, get_symbol_index
+from visualization import plot_correlation, plot_forecast, plot_stock_data
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
-# RapidAPI credentials
-RAPIDAPI_KEY = "af4b7ada73msh7333fb00c727f70p195232jsne091685d1739"
+# Function to forecast the next bars and draw them over the recent history
+def predict_trend(df, period, freq, symbol=None, series_type=None, engine="prophet", interval=None):
+    if symbol is not None:
+        traffic.record_forecast(symbol, series_type, period, freq, engine, interval=interval)
+    result = forecast_trend(df, period, freq, symbol, series_type, engine, interval=interval)
+    plot_forecast(df, result, symbol, template='plotly_dark')
+    return result.direction
 
-# Expanded company name to stock symbol mapping
-company_symbol_mapping = {
-    "Netflix": "NFLX",
-    "Apple": "AAPL",
-    "Microsoft": "MSFT",
-    "Amazon": "AMZN",
-    "Google": "GOOGL",
-    "Facebook": "META",
-    "Tesla": "TSLA",
-    "Nvidia": "NVDA",
-    "Intel": "INTC",
-    "IBM": "IBM",
-    "Twitter": "TWTR",
-    "Salesforce": "CRM",
-    "Adobe": "ADBE",
-    "Zoom": "ZM",
-    "PayPal": "PYPL",
-    "Snap": "SNAP",
-    "Uber": "UBER",
-    "Airbnb": "ABNB",
-    "Spotify": "SPOT",
-    "Slack": "WORK",
-    "Shopify": "SHOP",
-    "Alibaba": "BABA",
-    "Tencent": "TCEHY",
-    "Baidu": "BIDU",
-    "JD.com": "JD",
-    "Sina": "SINA",
-    "Etsy": "ETSY",
-    "Square": "SQ",
-    "Palantir": "PLTR",
-    "Roku": "ROKU",
-    "DocuSign": "DOCU",
-    "Twilio": "TWLO",
-    "Atlassian": "TEAM",
-    "Zillow": "Z",
-    "DraftKings": "DKNG",
-    "Pinterest": "PINS",
-    "Alibaba": "BABA",
-    "Alibaba": "BABA",
-    "Xiaomi": "XIACF",
-    "Lyft": "LYFT",
-    "Uber": "UBER",
-    "Moderna": "MRNA",
-    "Johnson & Johnson": "JNJ",
-    "Pfizer": "PFE",
-    "Merck": "MRK",
-    "Roche": "RHHBY",
-    "Novartis": "NVS",
-    "AstraZeneca": "AZN",
-    "Gilead": "GILD",
-    "Bristol-Myers Squibb": "BMY",
-    "Amgen": "AMGN",
-    "Eli Lilly": "LLY",
-    "GlaxoSmithKline": "GSK",
-    "Sanofi": "SNY",
-    "Abbott": "ABT",
-    "Thermo Fisher": "TMO",
-    "GE Healthcare": "GEHC",
-    "Siemens Healthineers": "SMMNY",
-    "Medtronic": "MDT",
-    "Boston Scientific": "BSX",
-    "Stryker": "SYK",
-    "Zimmer Biomet": "ZBH",
-    "Dexcom": "DXCM",
-    "Intuitive Surgical": "ISRG",
-    "Align Technology": "ALGN",
-    "Edwards Lifesciences": "EW",
-    "Hologic": "HOLX",
-    "Varian": "VAR",
-    "Illumina": "ILMN",
-    "NantKwest": "NK",
-    "Bluebird Bio": "BLUE",
-    "Sarepta Therapeutics": "SRPT",
-    "CRISPR Therapeutics": "CRSP",
-    "Docusign": "DOCU",
-    "CrowdStrike": "CRWD",
-    "Nutanix": "NTNX",
-    "Elastic": "ESTC",
-    "Snowflake": "SNOW",
-    "HashiCorp": "HCP",
-    "Okta": "OKTA",
-    "ServiceNow": "NOW",
-}
-# Function to fetch stock data from RapidAPI
-def fetch_stock_data(symbol, time_series_type, interval=None):
-    conn = http.client.HTTPSConnection("alpha-vantage.p.rapidapi.com")
-    
-    if time_series_type == "Intraday":
-        endpoint = f"/query?function=TIME_SERIES_INTRADAY&symbol={symbol}&interval={interval}&outputsize=compact&datatype=json"
-    elif time_series_type == "Weekly":
-        endpoint = f"/query?function=TIME_SERIES_WEEKLY&symbol={symbol}&outputsize=compact&datatype=json"
-    elif time_series_type == "Monthly":
-        endpoint = f"/query?function=TIME_SERIES_MONTHLY&symbol={symbol}&outputsize=compact&datatype=json"
-    
-    headers = {
-        'x-rapidapi-key': RAPIDAPI_KEY,
-        'x-rapidapi-host': "alpha-vantage.p.rapidapi.com"
-    }
-    
-    conn.request("GET", endpoint, headers=headers)
-    
-    response = conn.getresponse()
-    data = response.read()
-    
-    if response.status != 200:
-        st.error("Failed to fetch data from RapidAPI. Please try again later.")
-        return None
-    
-    data_json = json.loads(data.decode("utf-8"))
-    
-    if "Time Series" not in str(data_json.keys()):
-        if "Error Message" in data_json:
-            st.error(f"API Error: {data_json['Error Message']}")
-        elif "Note" in data_json:
-            st.error(f"API Note: {data_json['Note']}")
-        else:
-            st.error("Unexpected error. Please try again later.")
-        return None
-    
-    if time_series_type == "Intraday":
-        time_series_key = f"Time Series ({interval})"
-    elif time_series_type == "Weekly":
-        time_series_key = "Weekly Time Series"
-    elif time_series_type == "Monthly":
-        time_series_key = "Monthly Time Series"
-    
-    time_series = data_json.get(time_series_key)
-    return time_series
 
-# Function to convert fetched data into a DataFrame
-def convert_to_dataframe(time_series):
-    df = pd.DataFrame.from_dict(time_series, orient='index')
-    df.index = pd.to_datetime(df.index)
-    df = df.rename(columns={
-        '1. open': 'Open',
-        '2. high': 'High',
-        '3. low': 'Low',
-        '4. close': 'Close',
-        '5. volume': 'Volume'
-    })
-    df = df.astype(float)
-    return df
-
-# Function to train a model and predict stock trend
-# Function to train a model and predict stock trend
-def predict_trend(df, period, freq):
-    df_prophet = df.reset_index().rename(columns={"index": "ds", "Close": "y"})
-    
-    model = Prophet(daily_seasonality=True)
-    model.fit(df_prophet)
-
-    # Use lowercase 'h', 'w', 'm' instead of 'H', 'W', 'M'
-    future = model.make_future_dataframe(periods=period, freq=freq.lower())
-    forecast = model.predict(future)
-
-    fig = model.plot(forecast)
-    st.pyplot(fig)
-
-    forecast['trend_diff'] = forecast['yhat'].diff()
-
-    last_trend = forecast['trend_diff'].iloc[-1]
-    if last_trend > 0:
-        return "Up"
-    elif last_trend < 0:
-        return "Down"
-    else:
-        return "Neutral"
+# Function to compare the fetched watchlist: correlation, beta and volatility over a rolling window
+# The statistics are computed once for the whole watchlist, picking a subset only slices them
+def show_comparison(frames, series_type):
+    st.markdown("### Compare")
+    symbols = sorted(frames)
+    window = st.slider("Window (bars)", min_value=10, max_value=250, value=60, key="compare_window")
+    selected = st.multiselect("Companies", symbols, default=symbols, key="compare_symbols")
+    if len(selected) < 2:
+        st.info("Select at least two companies to compare.")
+        return
+    benchmark = st.selectbox("Beta against", selected, key="compare_benchmark")
 
+    section = get_cross_section(frames, window)
+    periods_per_year = PERIODS_PER_YEAR.get(series_type)
+    plot_correlation(section.corr(selected), selected, template='plotly_dark')
+    st.dataframe({
+        "Symbol": selected,
+        "Beta": section.betas(benchmark, selected).round(2),
+        "Volatility": section.volatility(selected, periods_per_year).round(4),
+    })
+    volatility = section.portfolio_volatility(selected, periods_per_year=periods_per_year)
+    st.markdown(f"Equal-weight portfolio volatility{' (annualized)' if periods_per_year else ''}: **{volatility:.2%}**")
 
-# Function to plot the stock data
-def plot_stock_data(df, symbol):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df.index, y=df['Close'], mode='lines', name=f'Close Price of {symbol}', line=dict(color='cyan')))
-    fig.add_trace(go.Scatter(x=df.index, y=df['Open'], mode='lines', name=f'Open Price of {symbol}', line=dict(color='green')))
-    fig.update_layout(
-        title=f'Stock Price of {symbol} Over Time',
-        xaxis_title='Date',
-        yaxis_title='Price',
-        hovermode='x',
-        template='plotly_dark'
-    )
-    st.plotly_chart(fig)
 
 # Streamlit app
 def main():
     st.title("FinAgent Stock Prediction")
+    show_api_stats()
     st.markdown("""
     <style>
     .reportview-container {
@@ -212,10 +63,38 @@ def main():
     search_term = st.text_input("Search for a Company", "")
     
     if search_term:
-        # Filter company names based on the search term
-        filtered_companies = {name: symbol for name, symbol in company_symbol_mapping.items() if search_term.lower() in name.lower()}
+        # Best matches for the search term: ticker or name prefix, substring, then close spellings
+        filtered_companies = dict(get_symbol_index().search(search_term, k=SEARCH_LIMIT))
         
         if filtered_companies:
+            if len(filtered_companies) > 1:
+                # Fetch the whole watchlist concurrently and render each company as it arrives
+                watchlist_type = st.selectbox("Watchlist Time Series Type", ["Intraday", "Weekly", "Monthly"], key="watchlist_type")
+                watchlist_interval = None
+                if watchlist_type == "Intraday":
+                    watchlist_interval = st.selectbox("Watchlist Interval", ["1min", "5min", "15min", "30min", "60min"], key="watchlist_interval")
+
+                # Remember the request so zooming a chart (a rerun) keeps the results on screen
+                watchlist_request = (tuple(filtered_companies), watchlist_type, watchlist_interval)
+                if st.button(f"Fetch Data for all {len(filtered_companies)} matches"):
+                    st.session_state['watchlist_fetched'] = watchlist_request
+                if st.session_state.get('watchlist_fetched') == watchlist_request:
+                    names_by_symbol = {symbol: name for name, symbol in filtered_companies.items()}
+                    progress = st.progress(0.0)
+                    results = fetch_many(names_by_symbol, watchlist_type, watchlist_interval)
+                    frames = {}
+                    for done, (stock_symbol, time_series, error) in enumerate(results, start=1):
+                        progress.progress(done / len(names_by_symbol))
+                        company_name = names_by_symbol[stock_symbol]
+                        if time_series:
+                            frames[stock_symbol] = convert_to_dataframe(time_series)
+                            st.markdown(f"#### {company_name} ({stock_symbol})")
+                            plot_stock_data(frames[stock_symbol], company_name, key=f'{company_name}_watchlist', template='plotly_dark')
+                        else:
+                            st.error(f"{company_name} ({stock_symbol}): {error}")
+                    if len(frames) > 1:
+                        show_comparison(frames, watchlist_type)
+
             for company_name, stock_symbol in filtered_companies.items():
                 st.markdown(f"### {company_name} ({stock_symbol})")
                 
@@ -224,8 +103,13 @@ def main():
                 interval = None
                 if time_series_type == "Intraday":
                     interval = st.selectbox("Select Interval", ["1min", "5min", "15min", "30min", "60min"], key=f'{company_name}_interval')
+
+                engine = st.selectbox("Forecast Engine", ENGINE_CHOICES, key=f'{company_name}_engine')
                 
+                request = (time_series_type, interval)
                 if st.button(f"Fetch Data for {company_name}"):
+                    st.session_state[f'{company_name}_fetched'] = request
+                if st.session_state.get(f'{company_name}_fetched') == request:
                     with st.spinner(f"Fetching data for {company_name}..."):
                         time_series = fetch_stock_data(stock_symbol, time_series_type, interval)
                     
@@ -235,14 +119,16 @@ def main():
                         st.write(f"Showing {time_series_type.lower()} data for: **{company_name} ({stock_symbol})**")
                         st.dataframe(df.head())
                         
-                        plot_stock_data(df, company_name)
+                        indicators = st.multiselect("Indicators", list(GROUPS), key=f'{company_name}_indicators')
+                        plot_stock_data(df, company_name, key=company_name, template='plotly_dark',
+                                        indicators=indicators, cache_key=(stock_symbol, time_series_type, interval))
                         
                         if time_series_type == "Intraday":
-                            trend = predict_trend(df, period=1, freq='H')  # Hourly prediction
+                            trend = predict_trend(df, period=1, freq='H', symbol=stock_symbol, series_type=time_series_type, engine=engine, interval=interval)  # Hourly prediction
                         elif time_series_type == "Weekly":
-                            trend = predict_trend(df, period=1, freq='W')  # Weekly prediction
+                            trend = predict_trend(df, period=1, freq='W', symbol=stock_symbol, series_type=time_series_type, engine=engine)  # Weekly prediction
                         elif time_series_type == "Monthly":
-                            trend = predict_trend(df, period=1, freq='M')  # Monthly prediction
+                            trend = predict_trend(df, period=1, freq='M', symbol=stock_symbol, series_type=time_series_type, engine=engine)  # Monthly prediction
                         
                         st.markdown(f"### Predicted Trend for next {time_series_type.lower()}: **{trend}**")
                     else:
@@ -0,0 +1,242 @@
+"""Walk-forward backtest of the Up / Down / Neutral trend signal.
+
+At every cutoff (one every ``stride`` bars) a model is fitted on the
+``window`` bars before it and its direction for each horizon is compared with
+what the price actually did over the same step: the signal for horizon h is
+the slope of the h-th forecast step, so it is scored against the close of bar
+h versus bar h - 1 (for h = 1, the next close versus the last observed one).
+
+The NumPy engines score all cutoffs of a symbol in one vectorized call over
+the stacked training windows. Prophet fits run in worker processes, each
+walking a contiguous block of cutoffs and warm-starting every fit from the
+previous one, so only the first fit of a block starts cold.
+
+    python backtest.py --csv finageninsights/finageninsights-main/updated_file.csv --engine holt --horizons 1,5
+    python backtest.py --series Weekly --freq W --engine prophet --stride 4 --window 104
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from forecast_engines import ENGINE_CHOICES
+
+DIRECTIONS = ("Down", "Neutral", "Up")
+
+
+# Function to load an updated_file.csv style history into symbol -> frame with a naive date index
+def load_history_csv(path, companies=None):
+    import pandas as pd
+
+    data = pd.read_csv(path, usecols=["Date", "Close", "Company"])
+    if companies:
+        data = data[data["Company"].isin(companies)]
+    # Dates carry their exchange offset; the local wall time is what the bars are labelled with
+    data["Date"] = pd.to_datetime(data["Date"].str[:19])
+    # The file repeats some companies' history, a date keeps its last row
+    data = data.drop_duplicates(["Company", "Date"], keep="last")
+    return {
+        company: group.set_index("Date")[["Close"]].sort_index()
+        for company, group in data.groupby("Company", sort=True)
+    }
+
+
+# Function to list the cutoffs, each the number of bars seen before forecasting
+def walk_forward_cutoffs(n_obs, window, horizon, stride=1):
+    return np.arange(window, n_obs - horizon + 1, stride)
+
+
+# Function to compute the realised move over each forecast step, shaped (n_cutoffs, horizon)
+def actual_steps(closes, cutoffs, horizon):
+    bars = cutoffs[:, np.newaxis] + np.arange(-1, horizon)
+    return np.diff(closes[bars], axis=1)
+
+
+# Function to tally hits and the actual x predicted confusion matrix of one horizon
+def score(predicted, actual):
+    valid = ~(np.isnan(predicted) | np.isnan(actual))
+    predicted = np.sign(predicted[valid]).astype(int) + 1
+    actual = np.sign(actual[valid]).astype(int) + 1
+    confusion = np.bincount(actual * 3 + predicted, minlength=9).reshape(3, 3)
+    hits = int(np.trace(confusion))
+    return {
+        "cutoffs": int(valid.sum()),
+        "failed": int((~valid).sum()),
+        "hits": hits,
+        "hit_rate": hits / valid.sum() if valid.any() else None,
+        "confusion": confusion.tolist(),
+    }
+
+
+# Function to forecast every cutoff of one series with a NumPy engine, returns the forecast steps
+def _vectorized_steps(closes, cutoffs, window, horizon, engine, freq):
+    from forecast_engines import SEASON_LENGTH, forecast_batch
+
+    params = {}
+    if engine == "seasonal_naive":
+        params["season_length"] = SEASON_LENGTH.get(freq.upper(), 1)
+
+    # Row i is the window ending just before cutoffs[i], gathered into one (n_cutoffs, window) block
+    windows = np.lib.stride_tricks.sliding_window_view(closes, window)[cutoffs - window]
+    path, _ = forecast_batch(windows, horizon, engine, **params)
+    return np.diff(path, axis=1)
+
+
+# Function run inside a worker process: walk one block of cutoffs with warm-started Prophet fits
+def _prophet_worker(symbol, dates, closes, cutoffs, window, horizon, freq, timeout):
+    import pandas as pd
+    from prophet import Prophet
+
+    from model_cache import warm_start_params
+
+    started = time.perf_counter()
+    steps = np.full((len(cutoffs), horizon), np.nan)
+    errors = []
+    previous = None
+    for row, cutoff in enumerate(cutoffs):
+        history = pd.DataFrame({"ds": dates[cutoff - window:cutoff], "y": closes[cutoff - window:cutoff]})
+        fit_kwargs = {"timeout": timeout} if timeout else {}
+        model = None
+        try:
+            if previous is not None:
+                try:
+                    model = Prophet(daily_seasonality=True).fit(history, init=warm_start_params(previous), **fit_kwargs)
+                except (RuntimeError, ValueError):
+                    # The parameter shapes no longer match, fall back to a cold fit as fit_model does
+                    model = None
+            if model is None:
+                model = Prophet(daily_seasonality=True).fit(history, **fit_kwargs)
+            future = model.make_future_dataframe(periods=horizon, freq=freq.lower())
+            yhat = model.predict(future.iloc[-horizon - 1:])['yhat'].to_numpy()
+            steps[row] = np.diff(yhat)
+            previous = model
+        except Exception as exc:
+            errors.append(f"{type(exc).__name__}: {exc}")
+    return symbol, cutoffs, steps, errors, time.perf_counter() - started
+
+
+# Function to forecast every cutoff of every symbol with Prophet in parallel, blocks of cutoffs per worker
+def _prophet_steps(series, cutoffs, window, horizon, freq, max_workers, chunks, timeout):
+    if not series:
+        return {}, {}, {}
+    max_workers = max_workers or os.cpu_count() or 1
+    # Enough blocks to keep every worker busy, but as few as possible since each starts cold
+    chunks = chunks or max(1, math.ceil(max_workers / len(series)))
+
+    steps = {symbol: np.full((len(cutoffs[symbol]), horizon), np.nan) for symbol in series}
+    seconds = dict.fromkeys(series, 0.0)
+    errors = {symbol: [] for symbol in series}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for symbol, (dates, closes) in series.items():
+            for block in np.array_split(cutoffs[symbol], chunks):
+                if len(block):
+                    futures.append(executor.submit(_prophet_worker, symbol, dates, closes, block, window, horizon, freq, timeout))
+        for future in as_completed(futures):
+            symbol, block, block_steps, block_errors, block_seconds = future.result()
+            steps[symbol][np.searchsorted(cutoffs[symbol], block)] = block_steps
+            errors[symbol].extend(block_errors)
+            seconds[symbol] += block_seconds
+    return steps, seconds, errors
+
+
+# Function to backtest one engine over many series, frames maps symbol -> frame with a Close column
+# Returns one result per (symbol, horizon) plus an "ALL" row per horizon pooling every symbol
+def backtest(frames, horizons=(1,), engine="ols", freq="D", window=250, stride=1, max_workers=None, chunks=None, timeout=120):
+    horizons = sorted(set(horizons))
+    max_horizon = horizons[-1]
+
+    series, cutoffs = {}, {}
+    for symbol, df in frames.items():
+        closes = df['Close'].to_numpy(dtype=np.float64)
+        symbol_cutoffs = walk_forward_cutoffs(len(closes), window, max_horizon, stride)
+        if len(symbol_cutoffs):
+            series[symbol] = (df.index.to_numpy(), closes)
+            cutoffs[symbol] = symbol_cutoffs
+
+    if engine == "prophet":
+        steps, seconds, errors = _prophet_steps(series, cutoffs, window, max_horizon, freq, max_workers, chunks, timeout)
+    else:
+        steps, seconds, errors = {}, {}, {}
+        for symbol, (_, closes) in series.items():
+            started = time.perf_counter()
+            steps[symbol] = _vectorized_steps(closes, cutoffs[symbol], window, max_horizon, engine, freq)
+            seconds[symbol] = time.perf_counter() - started
+            errors[symbol] = []
+
+    results = []
+    pooled = {h: ([], []) for h in horizons}
+    for symbol, (_, closes) in series.items():
+        actual = actual_steps(closes, cutoffs[symbol], max_horizon)
+        for h in horizons:
+            predicted_h, actual_h = steps[symbol][:, h - 1], actual[:, h - 1]
+            pooled[h][0].append(predicted_h)
+            pooled[h][1].append(actual_h)
+            results.append(dict(score(predicted_h, actual_h), symbol=symbol, horizon=h, engine=engine,
+                                seconds=seconds[symbol], errors=errors[symbol][:3]))
+
+    total_seconds = sum(seconds.values())
+    for h, (predicted_h, actual_h) in pooled.items():
+        if predicted_h:
+            results.append(dict(score(np.concatenate(predicted_h), np.concatenate(actual_h)), symbol="ALL", horizon=h,
+                                engine=engine, seconds=total_seconds, errors=[]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="history in the updated_file.csv layout; without it the series are fetched from the API")
+    parser.add_argument("--companies", help="comma-separated companies to keep from --csv")
+    parser.add_argument("--series", default="Weekly", choices=["Intraday", "Weekly", "Monthly"])
+    parser.add_argument("--interval", default=None, help="bar interval for Intraday, e.g. 60min")
+    parser.add_argument("--engine", default="ols", choices=ENGINE_CHOICES)
+    parser.add_argument("--horizons", default="1", help="comma-separated horizons in bars")
+    parser.add_argument("--freq", default="D", help="bar frequency, for Prophet's future dates and the seasonal period")
+    parser.add_argument("--window", type=int, default=250, help="training bars before each cutoff")
+    parser.add_argument("--stride", type=int, default=1, help="bars between consecutive cutoffs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunks", type=int, default=None, help="blocks of cutoffs per symbol for Prophet")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    if args.csv:
+        companies = [c.strip() for c in args.companies.split(",")] if args.companies else None
+        frames = load_history_csv(args.csv, companies)
+    else:
+        from api import company_symbol_mapping
+        from market_data import fetch_many
+        from data_processing import convert_to_dataframe
+
+        frames = {}
+        for symbol, time_series, error in fetch_many(company_symbol_mapping.values(), args.series, args.interval):
+            if time_series:
+                frames[symbol] = convert_to_dataframe(time_series)
+            else:
+                print(f"{symbol:<8} fetch failed: {error}")
+
+    horizons = [int(h) for h in args.horizons.split(",") if h.strip()]
+    started = time.perf_counter()
+    results = backtest(frames, horizons, args.engine, args.freq, args.window, args.stride, args.workers, args.chunks, args.timeout)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'symbol':<28} {'h':>3} {'cutoffs':>8} {'hit rate':>9} {'seconds':>8}  confusion (rows actual, columns predicted: {'/'.join(DIRECTIONS)})")
+    for result in results:
+        hit_rate = f"{result['hit_rate']:.1%}" if result['hit_rate'] is not None else "-"
+        print(f"{result['symbol'][:28]:<28} {result['horizon']:>3} {result['cutoffs']:>8} {hit_rate:>9} "
+              f"{result['seconds']:>8.2f}  {result['confusion']}")
+        for error in result["errors"]:
+            print(f"{'':<28} {error}")
+    print(f"{len(frames)} series, engine {args.engine}, in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "seconds": elapsed, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
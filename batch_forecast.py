@@ -0,0 +1,182 @@
+"""Score trend direction for many symbols at once.
+
+With the Prophet engine each symbol is fitted in a worker process and only a
+compact summary (direction, last yhat and its interval) is sent back, never
+the fitted model. A failing or slow symbol is reported in its own result and
+does not stop the rest of the batch. The NumPy engines skip the pool and score
+every series of the same length in one vectorized call.
+
+    python batch_forecast.py --series Weekly --period 1 --freq W --engine prophet
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from forecast_engines import ENGINE_CHOICES
+
+
+# Function run inside a worker process, returns a small picklable summary
+def _forecast_worker(symbol, df, period, freq, timeout):
+    from data_processing import fit_model, trend_direction
+
+    started = time.perf_counter()
+    try:
+        # The Stan optimizer enforces the timeout itself and kills its own process when it runs over
+        model = fit_model(df, timeout=timeout) if timeout else fit_model(df)
+        future = model.make_future_dataframe(periods=period, freq=freq.lower())
+        forecast = model.predict(future)
+        yhat = forecast['yhat'].to_numpy()
+        last = forecast.iloc[-1]
+        return {
+            "symbol": symbol,
+            "direction": trend_direction(yhat),
+            "yhat": float(last['yhat']),
+            "yhat_lower": float(last['yhat_lower']),
+            "yhat_upper": float(last['yhat_upper']),
+            "error": None,
+            "seconds": time.perf_counter() - started,
+        }
+    except Exception as exc:
+        return _failed(symbol, f"{type(exc).__name__}: {exc}", time.perf_counter() - started)
+
+
+def _failed(symbol, error, seconds=None):
+    return {
+        "symbol": symbol,
+        "direction": None,
+        "yhat": None,
+        "yhat_lower": None,
+        "yhat_upper": None,
+        "error": error,
+        "seconds": seconds,
+    }
+
+
+# Function to score every frame with a NumPy engine, batching series of equal length, horizon in bars
+# and season together; like forecast_frame, the bar paths are read off at the requested dates
+def _forecast_vectorized(frames, period, freq, engine):
+    from data_processing import future_dates
+    from forecast_engines import bar_positions, forecast_batch, forecast_interval, path_at, path_directions, season_length_for
+
+    groups = {}
+    positions = {}
+    results = {}
+    for symbol, df in frames.items():
+        if len(df) < 2:
+            results[symbol] = _failed(symbol, "ValueError: need at least 2 bars")
+            continue
+        dates = df.index.to_numpy()
+        # The last step of the requested horizon, enough for the direction and the final value
+        targets = df.index[-1:].append(future_dates(df.index[-1], period, freq))[-2:]
+        horizon, positions[symbol] = bar_positions(dates, targets.to_numpy())
+        season_length = season_length_for(dates) if engine == "seasonal_naive" else None
+        groups.setdefault((len(df), horizon, season_length), []).append(symbol)
+
+    for (_, horizon, season_length), symbols in groups.items():
+        params = {"season_length": season_length} if season_length else {}
+        started = time.perf_counter()
+        values = np.stack([frames[symbol]['Close'].to_numpy(dtype=np.float64) for symbol in symbols])
+        path, sigma = forecast_batch(values, horizon, engine, **params)
+        lower, upper = forecast_interval(path, sigma)
+        at = np.stack([positions[symbol] for symbol in symbols])
+        path, lower, upper = path_at(path, at), path_at(lower, at), path_at(upper, at)
+        directions = path_directions(path)
+        seconds = (time.perf_counter() - started) / len(symbols)
+        for row, symbol in enumerate(symbols):
+            results[symbol] = {
+                "symbol": symbol,
+                "direction": str(directions[row]),
+                "yhat": float(path[row, -1]),
+                "yhat_lower": float(lower[row, -1]),
+                "yhat_upper": float(upper[row, -1]),
+                "error": None,
+                "seconds": seconds,
+            }
+    return results
+
+
+# Function to forecast many symbols in parallel, frames maps symbol -> OHLCV DataFrame
+def forecast_many(frames, period=1, freq="W", max_workers=None, timeout=120, engine="prophet"):
+    results = {}
+    if not frames:
+        return results
+    if engine != "prophet":
+        return _forecast_vectorized(frames, period, freq, engine)
+
+    max_workers = max_workers or min(len(frames), os.cpu_count() or 1)
+    # Workers enforce the per-task timeout themselves, this only guards against a hung worker
+    deadline = None
+    if timeout:
+        deadline = timeout * (len(frames) // max_workers + 1) + 30
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    timed_out = False
+    try:
+        futures = {
+            executor.submit(_forecast_worker, symbol, df, period, freq, timeout): symbol
+            for symbol, df in frames.items()
+        }
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                except BrokenProcessPool as exc:
+                    results[symbol] = _failed(symbol, f"worker crashed: {exc}")
+        except FutureTimeoutError:
+            timed_out = True
+        for symbol in frames:
+            results.setdefault(symbol, _failed(symbol, "TimeoutError: forecast timed out"))
+    finally:
+        # shutdown only cancels queued work; a hung fit would keep its worker busy and block
+        # interpreter exit, so past the deadline the workers are killed
+        workers = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        if timed_out:
+            for process in workers:
+                process.terminate()
+            for process in workers:
+                process.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score trend direction for the whole symbol universe.")
+    parser.add_argument("--series", default="Weekly", choices=["Intraday", "Weekly", "Monthly"])
+    parser.add_argument("--interval", default=None, help="bar interval for Intraday, e.g. 60min")
+    parser.add_argument("--period", type=int, default=1)
+    parser.add_argument("--freq", default="W")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--engine", default="prophet", choices=ENGINE_CHOICES)
+    args = parser.parse_args()
+
+    from api import company_symbol_mapping
+    from market_data import fetch_many
+    from data_processing import convert_to_dataframe
+
+    frames = {}
+    for symbol, time_series, error in fetch_many(company_symbol_mapping.values(), args.series, args.interval):
+        if time_series:
+            frames[symbol] = convert_to_dataframe(time_series)
+        else:
+            print(f"{symbol:<8} fetch failed: {error}")
+
+    started = time.perf_counter()
+    results = forecast_many(frames, args.period, args.freq, args.workers, args.timeout, args.engine)
+    for symbol in sorted(results):
+        result = results[symbol]
+        if result["error"]:
+            print(f"{symbol:<8} {'error':<8} {result['error']}")
+        else:
+            print(f"{symbol:<8} {result['direction']:<8} {result['yhat']:>10.2f} "
+                  f"[{result['yhat_lower']:.2f}, {result['yhat_upper']:.2f}]")
+    print(f"{len(results)} symbols in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Time finageninsights data loading and filtering on a synthetic multi-million-row history.
+
+The CSV has the same columns as updated_file.csv and is generated once per
+size under .cache/benchmarks. Run from the repository root:
+
+    python -m benchmarks.bench_insights --rows 2000000 --companies 500
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.results import Recorder
+
+INSIGHTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "finageninsights", "finageninsights-main")
+
+DATA_DIR = os.path.join(".cache", "benchmarks")
+
+
+def company_name(i):
+    return f"Company {i:04d} Incorporated"
+
+
+# Function to write rows // companies business days for every company, in the updated_file.csv layout
+def make_history_csv(path, rows, companies, seed=0):
+    import pandas as pd
+
+    days = max(1, rows // companies)
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-06-28", periods=days, tz="America/New_York").strftime("%Y-%m-%d %H:%M:%S%z")
+    dates = dates.str.replace(r"(\d\d)(\d\d)$", r"\1:\2", regex=True)
+
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, size=(companies, days)), axis=1)).ravel()
+    data = pd.DataFrame({
+        "Date": np.tile(dates.to_numpy(), companies),
+        "Open": close * (1 + rng.normal(0, 0.004, close.size)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(100_000, 10_000_000, close.size),
+        "Dividends": 0.0,
+        "Stock Splits": 0,
+        "Company": np.repeat([company_name(i) for i in range(companies)], days),
+    })
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data.to_csv(path, index=False)
+    return path
+
+
+# Function to import the finageninsights page as a module without running it, with its own modules first on the path
+def import_insights_app():
+    sys.path.insert(0, INSIGHTS_DIR)
+    spec = importlib.util.spec_from_file_location("finageninsights_app", os.path.join(INSIGHTS_DIR, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(recorder, csv_path, repeat, slow_repeat):
+    app = import_insights_app()
+    from data_index import DataIndex
+    from historical_store import build_store, store_path
+    from range_metrics import RangeMetrics
+
+    columns = app.PAGE_COLUMNS
+    store_dir = store_path(csv_path)
+    remove_store = lambda: shutil.rmtree(store_dir, ignore_errors=True)
+    rows = recorder.params["rows"]
+
+    recorder.measure("load_csv", "all", lambda: app.load_csv(csv_path, columns), slow_repeat, rows=rows)
+    recorder.measure("build_store", "all", lambda: build_store(csv_path, store_dir), slow_repeat, setup=remove_store, rows=rows)
+    recorder.measure("load_data", "all", lambda: app.load_data(csv_path, columns=columns), repeat, rows=rows)
+
+    company = company_name(recorder.params["companies"] // 2)
+    recorder.measure("load_data", "one_company", lambda: app.load_data(csv_path, company_name=company, columns=columns), repeat)
+
+    data = app.load_data(csv_path, columns=columns)
+    recorder.measure("index_build", "all", lambda: DataIndex(data), slow_repeat, rows=rows)
+    index = DataIndex(data)
+
+    # Full-scan filters against the indexed ones, for one company and for a substring matching many
+    for case, query in (("one_company", company), ("substring", "Company 00")):
+        recorder.measure("filter_by_company[scan]", case, lambda: app.filter_data_by_company(data, query), repeat)
+        recorder.measure("filter_by_company[index]", case, lambda: app.filter_data_by_company(data, query, index=index), repeat)
+
+    company_data = app.filter_data_by_company(data, company)
+    recorder.measure("filter_by_years[scan]", "one_company", lambda: app.filter_data_by_years(company_data, 2015, 2020), repeat)
+    recorder.measure("filter_by_years[index]", "one_company",
+                     lambda: app.filter_data_by_years(company_data, 2015, 2020, index=index, company_name=company), repeat)
+
+    recorder.measure("metrics_build", "all", lambda: RangeMetrics(index.data), slow_repeat, rows=rows)
+    metrics = index.metrics
+    scan_metrics = lambda: (company_data["Close"].mean(), company_data["Volume"].sum(), company_data["Close"].max())
+    recorder.measure("metrics[scan]", "one_company", scan_metrics, repeat)
+    recorder.measure("metrics[prefix]", "one_company", lambda: metrics.summary(index.row_ranges(company)), repeat)
+
+    recorder.measure("downsample_frame", "one_company", lambda: app.downsample_frame(company_data, "Close"), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--slow-repeat", type=int, default=2, help="runs for the multi-second stages (CSV parse, store build)")
+    parser.add_argument("--regenerate", action="store_true", help="rewrite the synthetic CSV even if it exists")
+    parser.add_argument("--output", help="results file (default: .cache/benchmarks/results/insights-<time>.json)")
+    args = parser.parse_args()
+
+    csv_path = os.path.join(DATA_DIR, f"history-{args.rows}-{args.companies}.csv")
+    if args.regenerate or not os.path.exists(csv_path):
+        print(f"Generating {csv_path}...")
+        make_history_csv(csv_path, args.rows, args.companies)
+
+    recorder = Recorder("insights", params=vars(args))
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ.update({
+            "FINAGENT_LLM_BACKEND": "stub",
+            "FINAGENT_LLM_CACHE": os.path.join(scratch, "llm_responses.sqlite3"),
+        })
+        run(recorder, csv_path, args.repeat, args.slow_repeat)
+
+    recorder.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
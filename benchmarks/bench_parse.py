@@ -0,0 +1,72 @@
+"""Compare parse_frame (behind convert_to_dataframe) against the previous from_dict/rename/astype path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parse --bars 20000 --repeat 7
+"""
+import argparse
+import random
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from data_processing import parse_frame
+
+
+def make_time_series(bars, intraday=True, seed=0, step=None):
+    rng = random.Random(seed)
+    if step is None:
+        step = np.timedelta64(1, "m") if intraday else np.timedelta64(7, "D")
+    start = np.datetime64("2024-01-01T09:30:00")
+    price = 100.0
+    time_series = {}
+    # Newest first, the way Alpha Vantage sends it
+    for i in range(bars, 0, -1):
+        stamp = str(start + i * step).replace("T", " ")
+        if not intraday:
+            stamp = stamp[:10]
+        price *= 1 + rng.gauss(0, 0.002)
+        time_series[stamp] = {
+            "1. open": f"{price * (1 + rng.gauss(0, 0.001)):.4f}",
+            "2. high": f"{price * 1.002:.4f}",
+            "3. low": f"{price * 0.998:.4f}",
+            "4. close": f"{price:.4f}",
+            "5. volume": str(rng.randint(1_000, 1_000_000)),
+        }
+    return time_series
+
+
+def convert_to_dataframe_from_dict(time_series):
+    df = pd.DataFrame.from_dict(time_series, orient='index')
+    df.index = pd.to_datetime(df.index)
+    df = df.rename(columns={
+        '1. open': 'Open',
+        '2. high': 'High',
+        '3. low': 'Low',
+        '4. close': 'Close',
+        '5. volume': 'Volume'
+    })
+    df = df.astype(float)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    time_series = make_time_series(args.bars)
+
+    expected = convert_to_dataframe_from_dict(time_series).sort_index()
+    actual = parse_frame(time_series)
+    pd.testing.assert_frame_equal(actual.astype(float), expected, check_freq=False)
+
+    for name, fn in (("from_dict", convert_to_dataframe_from_dict), ("columnar", parse_frame)):
+        best = min(timeit.repeat(lambda: fn(time_series), number=1, repeat=args.repeat))
+        print(f"{name:>10}: {best * 1000:8.2f} ms for {args.bars} bars")
+
+
+if __name__ == "__main__":
+    main()
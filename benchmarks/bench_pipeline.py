@@ -0,0 +1,101 @@
+"""Time each stage of the fetch → parse → forecast → plot pipeline against a local stand-in API.
+
+The stand-in serves the payloads from benchmarks.payloads, so runs need no
+network or quota and replay the same bytes every time. Run from the
+repository root:
+
+    python -m benchmarks.bench_pipeline --engines ols,holt,prophet --repeat 5
+    python -m benchmarks.compare .cache/benchmarks/results/pipeline-A.json .cache/benchmarks/results/pipeline-B.json
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.payloads import PAYLOAD_CASES, PAYLOAD_DIR, load_payloads
+from benchmarks.results import Recorder
+from benchmarks.stub_server import StubServer
+
+# Forecast frequency the app uses for each series type
+FREQUENCIES = {"Intraday": "H", "Weekly": "W", "Monthly": "M"}
+
+SYMBOL = "BENCH"
+
+
+def run(recorder, series_types, engines, repeat, prophet_repeat):
+    # Imported here so the app modules pick up the stand-in URL and scratch cache from the environment
+    from api import fetch_stock_data
+    from data_processing import convert_to_dataframe, forecast_cache, frame_cache, model_cache, predict_trend
+    from downsample import MAX_POINTS
+    from market_data import ohlcv_cache
+    from visualization import plot_forecast, plot_stock_data
+
+    for series_type in series_types:
+        case = series_type.lower()
+        interval = next(case_interval for case_type, case_interval, outputsize, _ in PAYLOAD_CASES.values()
+                        if case_type == series_type and outputsize == "full")
+        fetch = lambda: fetch_stock_data(SYMBOL, series_type, interval)
+
+        recorder.measure("fetch_cold", case, fetch, repeat, setup=ohlcv_cache.clear)
+        ttl = ohlcv_cache.ttl[series_type]
+        ohlcv_cache.ttl[series_type] = 0
+        recorder.measure("fetch_refresh", case, fetch, repeat)
+        ohlcv_cache.ttl[series_type] = ttl
+        recorder.measure("fetch_warm", case, fetch, repeat)
+
+        time_series = fetch()
+        convert = lambda: convert_to_dataframe(time_series)
+        recorder.measure("convert_to_dataframe", case, convert, repeat, setup=frame_cache.clear, bars=len(time_series))
+        recorder.measure("convert_to_dataframe[shared]", case, convert, repeat)
+        df = convert_to_dataframe(time_series)
+
+        freq = FREQUENCIES[series_type]
+        clear_caches = lambda: (model_cache.clear(), forecast_cache.clear())
+        for engine in engines:
+            predict = lambda: predict_trend(df, 1, freq, symbol=SYMBOL, series_type=series_type, engine=engine)
+            runs = prophet_repeat if engine == "prophet" else repeat
+            recorder.measure(f"predict_trend[{engine}]", case, predict, runs, setup=clear_caches)
+            if engine == "prophet":
+                # Same bars again: a new forecast from the cached model, then the cached result
+                predict()
+                recorder.measure("predict_trend[prophet,model_cached]", case, predict, runs, setup=forecast_cache.clear)
+                recorder.measure("predict_trend[prophet,cached]", case, predict, runs)
+
+        result = predict_trend(df, 1, freq, symbol=SYMBOL, series_type=series_type, engine=engines[-1])
+        plot = lambda: plot_forecast(df, result, SYMBOL)
+        recorder.measure("plot_forecast", case, plot, repeat, figure_bytes=len(plot().to_json()))
+
+        # The bytes sent to the browser matter as much as the server time
+        for stage, max_points in (("plot_stock_data", MAX_POINTS), ("plot_stock_data[full]", None)):
+            plot = lambda: plot_stock_data(df, SYMBOL, max_points=max_points)
+            recorder.measure(stage, case, plot, repeat, figure_bytes=len(plot().to_json()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", default="Intraday,Weekly,Monthly", help="comma-separated series types")
+    parser.add_argument("--engines", default="ols,holt,seasonal_naive,prophet", help="comma-separated forecast engines")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--prophet-repeat", type=int, default=3, help="runs for the (slow) Prophet stages")
+    parser.add_argument("--payloads", default=PAYLOAD_DIR, help="directory of recorded payloads")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stand-in adds to every response")
+    parser.add_argument("--output", help="results file (default: .cache/benchmarks/results/pipeline-<time>.json)")
+    args = parser.parse_args()
+
+    series_types = [s.strip() for s in args.series.split(",") if s.strip()]
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    recorder = Recorder("pipeline", params=vars(args))
+
+    with StubServer(load_payloads(args.payloads), latency=args.latency) as server, tempfile.TemporaryDirectory() as scratch:
+        os.environ.update({
+            "FINAGENT_API_URL": server.url,
+            "FINAGENT_CACHE_DIR": os.path.join(scratch, "ohlcv"),
+            "FINAGENT_CALLS_PER_MINUTE": "1000000",
+        })
+        os.environ.pop("FINAGENT_MODEL_DIR", None)
+        run(recorder, series_types, engines, args.repeat, args.prophet_repeat)
+
+    recorder.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
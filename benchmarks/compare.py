@@ -0,0 +1,51 @@
+"""Compare two benchmark result files stage by stage.
+
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json --threshold 0.10
+
+Exits with status 1 when any stage got slower than the threshold allows.
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        run = json.load(f)
+    return run, {(row["stage"], row["case"]): row for row in run["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown of the best time, as a fraction")
+    parser.add_argument("--metric", default="best_ms", choices=["best_ms", "median_ms"])
+    args = parser.parse_args()
+
+    baseline_run, baseline = load_results(args.baseline)
+    candidate_run, candidate = load_results(args.candidate)
+    print(f"baseline  {baseline_run['environment'].get('commit')}  {baseline_run['created_at']}")
+    print(f"candidate {candidate_run['environment'].get('commit')}  {candidate_run['created_at']}")
+
+    regressions = 0
+    for key, row in candidate.items():
+        stage, case = key
+        if key not in baseline:
+            print(f"{stage:>30} {case:>14}: {row[args.metric]:10.2f} ms  (new)")
+            continue
+        before, after = baseline[key][args.metric], row[args.metric]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  SLOWER"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{stage:>30} {case:>14}: {before:10.2f} -> {after:10.2f} ms  {change:+7.1%}{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
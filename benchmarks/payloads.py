@@ -0,0 +1,109 @@
+"""Alpha Vantage payloads for the offline benchmarks.
+
+Each case is one response shape the app requests. Payloads are generated
+deterministically the first time and saved as JSON, so every run replays the
+same bytes; ``--record SYMBOL`` replaces them with real responses (needs
+RAPIDAPI_KEY and a network connection).
+
+    python -m benchmarks.payloads --dir .cache/benchmarks/payloads
+    python -m benchmarks.payloads --record NFLX
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from benchmarks.bench_parse import make_time_series
+
+PAYLOAD_DIR = os.path.join(".cache", "benchmarks", "payloads")
+
+# name: (series type, interval, outputsize, bars), bar counts follow what Alpha Vantage returns
+PAYLOAD_CASES = {
+    "intraday_compact": ("Intraday", "5min", "compact", 100),
+    "intraday_full": ("Intraday", "1min", "full", 20000),
+    "weekly_compact": ("Weekly", None, "compact", 100),
+    "weekly_full": ("Weekly", None, "full", 1300),
+    "monthly_compact": ("Monthly", None, "compact", 100),
+    "monthly_full": ("Monthly", None, "full", 300),
+}
+
+FUNCTIONS = {
+    "Intraday": "TIME_SERIES_INTRADAY",
+    "Weekly": "TIME_SERIES_WEEKLY",
+    "Monthly": "TIME_SERIES_MONTHLY",
+}
+
+STEPS = {
+    "Intraday": np.timedelta64(1, "m"),
+    "Weekly": np.timedelta64(7, "D"),
+    "Monthly": np.timedelta64(30, "D"),
+}
+
+
+def series_key(series_type, interval):
+    if series_type == "Intraday":
+        return f"Time Series ({interval})"
+    return f"{series_type} Time Series"
+
+
+def make_payload(case, symbol="BENCH"):
+    series_type, interval, outputsize, bars = PAYLOAD_CASES[case]
+    time_series = make_time_series(bars, intraday=series_type == "Intraday", seed=bars, step=STEPS[series_type])
+    meta = {"1. Information": f"{series_type} Prices", "2. Symbol": symbol, "4. Output Size": outputsize}
+    if interval:
+        meta["4. Interval"] = interval
+    return {"Meta Data": meta, series_key(series_type, interval): time_series}
+
+
+def payload_path(directory, case):
+    return os.path.join(directory, f"{case}.json")
+
+
+# Function to return {case: response bytes}, generating and saving any case that is not on disk yet
+def load_payloads(directory=PAYLOAD_DIR, cases=None):
+    os.makedirs(directory, exist_ok=True)
+    payloads = {}
+    for case in cases or PAYLOAD_CASES:
+        path = payload_path(directory, case)
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                json.dump(make_payload(case), f)
+        with open(path, "rb") as f:
+            payloads[case] = f.read()
+    return payloads
+
+
+# Function to save real responses for every case, one request per case against the live API
+def record_payloads(symbol, directory=PAYLOAD_DIR):
+    from market_data import RAPIDAPI_HOST, RAPIDAPI_KEY, rapidapi_pool
+
+    os.makedirs(directory, exist_ok=True)
+    headers = {"x-rapidapi-key": RAPIDAPI_KEY, "x-rapidapi-host": RAPIDAPI_HOST}
+    for case, (series_type, interval, outputsize, _) in PAYLOAD_CASES.items():
+        endpoint = f"/query?function={FUNCTIONS[series_type]}&symbol={symbol}&outputsize={outputsize}&datatype=json"
+        if interval:
+            endpoint += f"&interval={interval}"
+        status, body = rapidapi_pool.request("GET", endpoint, headers=headers)
+        if status != 200 or series_key(series_type, interval).encode() not in body:
+            raise RuntimeError(f"{case}: unexpected response ({status}): {body[:200]!r}")
+        with open(payload_path(directory, case), "wb") as f:
+            f.write(body)
+        print(f"recorded {case}: {len(body):,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=PAYLOAD_DIR)
+    parser.add_argument("--record", metavar="SYMBOL", help="replace the payloads with live responses for SYMBOL")
+    args = parser.parse_args()
+
+    if args.record:
+        record_payloads(args.record, args.dir)
+        return
+    for case, body in load_payloads(args.dir).items():
+        print(f"{case:>16}: {len(body):>10,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Timing and result files shared by the benchmark suites."""
+import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+RESULTS_DIR = os.path.join(".cache", "benchmarks", "results")
+
+PACKAGES = ("numpy", "pandas", "pyarrow", "prophet", "cmdstanpy", "plotly", "streamlit")
+
+
+def environment():
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+# Function to time fn over repeat runs, setup runs untimed before each one; returns milliseconds
+def time_call(fn, repeat=5, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "best_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "repeat": repeat,
+    }
+
+
+class Recorder:
+    """Collects one row per (stage, case) and writes them with the run's environment."""
+
+    def __init__(self, suite, params=None):
+        self.suite = suite
+        self.params = params or {}
+        self.rows = []
+
+    def measure(self, stage, case, fn, repeat=5, setup=None, **extra):
+        row = dict(stage=stage, case=case, **extra, **time_call(fn, repeat, setup))
+        self.rows.append(row)
+        print(f"{stage:>22} {case:>22}: best {row['best_ms']:10.2f} ms  median {row['median_ms']:10.2f} ms")
+        return row
+
+    def write(self, path=None):
+        stamp = datetime.datetime.now(datetime.timezone.utc)
+        if path is None:
+            path = os.path.join(RESULTS_DIR, f"{self.suite}-{stamp:%Y%m%d-%H%M%S}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "suite": self.suite,
+                "created_at": stamp.isoformat(timespec="seconds"),
+                "environment": environment(),
+                "params": self.params,
+                "results": self.rows,
+            }, f, indent=2)
+        print(f"Results written to {path}")
+        return path
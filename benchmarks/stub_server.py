@@ -0,0 +1,106 @@
+"""Local stand-in for the RapidAPI Alpha Vantage endpoint, serving the benchmark payloads.
+
+Any symbol gets the payload recorded for its series type and outputsize, so
+the app can run end to end without network or quota:
+
+    python -m benchmarks.stub_server --port 8765
+    FINAGENT_API_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.payloads import FUNCTIONS, PAYLOAD_CASES, PAYLOAD_DIR, load_payloads, series_key
+
+SERIES_TYPES = {function: series_type for series_type, function in FUNCTIONS.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        series_type = SERIES_TYPES.get(query.get("function", [""])[0])
+        body = self.server.stub.response(series_type, query.get("interval", [None])[0], query.get("outputsize", ["compact"])[0])
+        if self.server.stub.latency:
+            time.sleep(self.server.stub.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """Threaded HTTP server on localhost answering ``/query`` from recorded payloads.
+
+    Use as a context manager; ``url`` is what FINAGENT_API_URL should be set to.
+    ``latency`` adds a fixed delay per response to mimic the network.
+    """
+
+    def __init__(self, payloads=None, host="127.0.0.1", port=0, latency=0.0):
+        self.payloads = payloads if payloads is not None else load_payloads(PAYLOAD_DIR)
+        self.latency = latency
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def response(self, series_type, interval, outputsize):
+        self.requests += 1
+        for case, (case_type, case_interval, case_outputsize, _) in PAYLOAD_CASES.items():
+            if case_type == series_type and case_outputsize == outputsize and case in self.payloads:
+                body = self.payloads[case]
+                # One recorded interval stands in for all of them
+                if interval and interval != case_interval:
+                    body = body.replace(series_key(case_type, case_interval).encode(), series_key(case_type, interval).encode())
+                return body
+        return b'{"Error Message": "No benchmark payload for this request."}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dir", default=PAYLOAD_DIR)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = StubServer(load_payloads(args.dir), port=args.port, latency=args.latency)
+    print(f"Serving Alpha Vantage payloads on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import http.client
+import queue
+import threading
+
+
+class ConnectionPool:
+    """Thread-safe pool of kept-alive HTTP(S) connections to a single host.
+
+    Connections are handed out one request at a time and returned afterwards,
+    so concurrent callers reuse warm TLS sessions instead of opening a new one
+    per request.
+    """
+
+    def __init__(self, host, port=None, use_https=True, maxsize=10, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_https = use_https
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize)
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _new_connection(self):
+        connection_class = http.client.HTTPSConnection if self.use_https else http.client.HTTPConnection
+        with self._lock:
+            self.created += 1
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method, path, headers=None):
+        conn, reused = self._acquire()
+        try:
+            conn.request(method, path, headers=headers or {})
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+            # The server may have dropped an idle keep-alive connection, retry once on a fresh one
+            conn = self._new_connection()
+            try:
+                conn.request(method, path, headers=headers or {})
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return response.status, body
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -1,37 +1,315 @@
-import pandas as pd
-from prophet import Prophet
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from forecast_engines import bar_positions, forecast_batch, forecast_interval, path_at, season_length_for
+from indicators import enough_history, with_indicators
+from metrics import count_cache, span
+from model_cache import ModelCache, data_fingerprint, warm_start_params
 
+# Fitted models shared by every session, optionally mirrored to disk
+model_cache = ModelCache(
+    maxsize=int(os.getenv("FINAGENT_MODEL_CACHE_SIZE", "32")),
+    cache_dir=os.getenv("FINAGENT_MODEL_DIR"),
+)
+
+# Prices are parsed to float32 (about 7 significant digits); fitting code converts to float64 itself
+PRICE_DTYPE = np.float32
+
+PRICE_FIELDS = {
+    'Open': '1. open',
+    'High': '2. high',
+    'Low': '3. low',
+    'Close': '4. close',
+}
+VOLUME_FIELD = '5. volume'
+
+# Function to parse an Alpha Vantage "Time Series" payload into typed arrays sorted by time
+def parse_time_series(time_series):
+    n = len(time_series)
+    timestamps = list(time_series)
+    bars = list(time_series.values())
+
+    # Alpha Vantage returns newest first, read it back to front so the arrays come out ascending
+    if n > 1 and timestamps[0] > timestamps[-1]:
+        timestamps.reverse()
+        bars.reverse()
+
+    index = np.array(timestamps, dtype='datetime64[ns]')
+    columns = {
+        name: np.fromiter((bar[field] for bar in bars), dtype=PRICE_DTYPE, count=n)
+        for name, field in PRICE_FIELDS.items()
+    }
+    columns['Volume'] = np.fromiter((bar[VOLUME_FIELD] for bar in bars), dtype=np.int64, count=n)
+
+    if n > 1 and not (index[1:] > index[:-1]).all():
+        order = np.argsort(index, kind='stable')
+        index = index[order]
+        columns = {name: values[order] for name, values in columns.items()}
+
+    return index, columns
+
+class FrameCache:
+    """Parsed frames shared by every session, keyed by the payload object they were parsed from.
+
+    The OHLCV cache hands every session the same payload until it refreshes,
+    so sessions showing the same series share one read-only frame instead of
+    each parsing its own copy. The payload is held alongside its frame, so its
+    id cannot be reused while the entry lives.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, time_series):
+        with self._lock:
+            cached = self._frames.get(id(time_series))
+            if cached is None or cached[0] is not time_series:
+                return None
+            self._frames.move_to_end(id(time_series))
+            return cached[1]
+
+    def put(self, time_series, frame):
+        with self._lock:
+            self._frames[id(time_series)] = (time_series, frame)
+            self._frames.move_to_end(id(time_series))
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    # Rows, span and bytes of every shared frame, largest first
+    def memory_report(self):
+        with self._lock:
+            frames = [frame for _, frame in self._frames.values()]
+        report = [{
+            "rows": len(frame),
+            "first": str(frame.index[0]) if len(frame) else None,
+            "last": str(frame.index[-1]) if len(frame) else None,
+            "bytes": int(frame.memory_usage(index=True, deep=True).sum()),
+        } for frame in frames]
+        report.sort(key=lambda entry: entry["bytes"], reverse=True)
+        return {"frames": len(report), "bytes": sum(entry["bytes"] for entry in report), "largest": report[:5]}
+
+
+frame_cache = FrameCache(maxsize=int(os.getenv("FINAGENT_FRAME_CACHE_SIZE", "64")))
+
+# Returns a read-only frame shared with every other caller passing the same payload; copy it before modifying
 def convert_to_dataframe(time_series):
-    df = pd.DataFrame.from_dict(time_series, orient='index')
-    df.index = pd.to_datetime(df.index)
-    df = df.rename(columns={
-        '1. open': 'Open',
-        '2. high': 'High',
-        '3. low': 'Low',
-        '4. close': 'Close',
-        '5. volume': 'Volume'
-    })
-    df = df.astype(float)
+    df = frame_cache.get(time_series)
+    if df is not None:
+        count_cache("frame", "hit")
+        return df
+
+    count_cache("frame", "miss")
+    df = parse_frame(time_series)
+    frame_cache.put(time_series, df)
     return df
 
-def predict_trend(df, period, freq):
-    df_prophet = df.reset_index().rename(columns={"index": "ds", "Close": "y"})
-    
-    model = Prophet(daily_seasonality=True)
-    model.fit(df_prophet)
+def parse_frame(time_series):
+    import pandas as pd
 
-    future = model.make_future_dataframe(periods=period, freq=freq.lower())
-    forecast = model.predict(future)
+    with span("parse"):
+        index, columns = parse_time_series(time_series)
+        for values in columns.values():
+            values.flags.writeable = False
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(index), copy=False)
+
+# Function to fit a Prophet model, reusing or warm-starting from the model cache when the symbol is known
+# Regressors name columns of df (e.g. indicator columns) added to the model as extra regressors
+# interval keeps intraday models of one symbol apart, so a refit is only warm-started at the same bar size
+# Extra keyword arguments go to Prophet.fit (and on to the Stan optimizer, e.g. timeout=)
+def fit_model(df, symbol=None, series_type=None, regressors=(), interval=None, **fit_kwargs):
+    # Prophet and its Stan backend are only loaded once a forecast is actually requested
+    from prophet import Prophet
+
+    def new_model():
+        model = Prophet(daily_seasonality=True)
+        for name in regressors:
+            model.add_regressor(name)
+        return model
+
+    if symbol is None:
+        df_prophet = df.reset_index().rename(columns={"index": "ds", "Close": "y"})
+        with span("prophet_fit", start="cold"):
+            return new_model().fit(df_prophet, **fit_kwargs)
+
+    # Models with other regressors have other parameter shapes, so they are cached and warm-started apart
+    if regressors:
+        series_type = f"{series_type}+{'+'.join(regressors)}"
+    key = (symbol, series_type, interval, data_fingerprint(df))
+    model = model_cache.get(key)
+    if model is not None:
+        count_cache("model", "hit")
+        return model
+
+    df_prophet = df.reset_index().rename(columns={"index": "ds", "Close": "y"})
+    previous = model_cache.latest(symbol, series_type, interval)
+    model = None
+    if previous is not None:
+        try:
+            with span("prophet_fit", start="warm"):
+                model = new_model().fit(df_prophet, init=warm_start_params(previous), **fit_kwargs)
+            count_cache("model", "warm")
+        except (RuntimeError, ValueError):
+            # The parameter shapes no longer match (e.g. fewer changepoints), fall back to a cold fit
+            model = None
+    if model is None:
+        with span("prophet_fit", start="cold"):
+            model = new_model().fit(df_prophet, **fit_kwargs)
+        count_cache("model", "miss")
 
-    fig = model.plot(forecast)
-    return fig, forecast
+    model_cache.put(key, model)
+    return model
 
-    forecast['trend_diff'] = forecast['yhat'].diff()
-    last_trend = forecast['trend_diff'].iloc[-1]
-    
+# Function to turn the slope of the last forecast step into Up / Down / Neutral
+def trend_direction(yhat):
+    last_trend = yhat[-1] - yhat[-2]
     if last_trend > 0:
         return "Up"
     elif last_trend < 0:
         return "Down"
     else:
         return "Neutral"
+
+class ForecastResult:
+    """The part of a forecast the pages show: the future bars, their interval and the direction.
+
+    Arrays start at the last observed bar (the model's value there) so the
+    overlay joins the history, then hold one entry per future bar. Instances
+    are small and never modified, so they are cached and shared as-is.
+    ``regressors`` are the ones the model was actually fitted with.
+    """
+
+    __slots__ = ("ds", "yhat", "yhat_lower", "yhat_upper", "direction", "engine", "regressors")
+
+    def __init__(self, ds, yhat, yhat_lower, yhat_upper, engine, regressors=()):
+        self.ds = ds
+        self.yhat = yhat
+        self.yhat_lower = yhat_lower
+        self.yhat_upper = yhat_upper
+        self.direction = trend_direction(yhat)
+        self.engine = engine
+        self.regressors = regressors
+
+    @classmethod
+    def from_frame(cls, forecast, last_date, engine, regressors=()):
+        # Prophet's frame also holds the in-sample fit of every observed bar, keep the last one only
+        start = max(0, int(np.searchsorted(forecast['ds'].to_numpy(), np.datetime64(last_date), side='right')) - 1)
+        tail = forecast.iloc[start:]
+        columns = [tail[name].to_numpy(dtype=np.float64, copy=True) for name in ('yhat', 'yhat_lower', 'yhat_upper')]
+        return cls(tail['ds'].to_numpy(dtype='datetime64[ns]', copy=True), *columns, engine=engine, regressors=regressors)
+
+    def __len__(self):
+        return len(self.ds) - 1
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({"ds": self.ds, "yhat": self.yhat, "yhat_lower": self.yhat_lower, "yhat_upper": self.yhat_upper})
+
+class ResultCache:
+    """Bounded LRU of finished ForecastResults shared by every session, keyed by the exact bars and horizon."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+# Finished forecast results for the exact same bars and horizon, filled ahead of demand by the prefetcher
+forecast_cache = ResultCache(maxsize=int(os.getenv("FINAGENT_FORECAST_CACHE_SIZE", "64")))
+
+# Function to forecast with the chosen engine, returns (prophet_model_or_None, forecast)
+# The full frame is only needed by callers that inspect the model; pages use predict_trend
+# Regressors are indicator columns for Prophet, held at their last value over the horizon;
+# the NumPy engines extrapolate the price alone and ignore them. interval only tells intraday
+# series apart for the indicator state and the model cache
+def forecast_frame(df, period, freq, symbol=None, series_type=None, engine="prophet", regressors=(), interval=None):
+    import pandas as pd
+
+    if engine == "prophet":
+        regressors = usable_regressors(df, regressors)
+        if regressors:
+            df = with_indicators(df, regressors, key=(symbol, series_type, interval) if symbol is not None else None)
+        model = fit_model(df, symbol, series_type, regressors=regressors, interval=interval)
+        with span("prophet_predict"):
+            future = model.make_future_dataframe(periods=period, freq=freq.lower())
+            if regressors:
+                future = future.join(df[list(regressors)].reindex(future['ds']).ffill().reset_index(drop=True))
+            return model, model.predict(future)
+
+    # The engines step in bars of the series, which need not be the requested freq (e.g. weekly
+    # bars forecast in days): forecast enough bars to cover the dates, then read the path off at them
+    ds = pd.DatetimeIndex([df.index[-1]]).append(future_dates(df.index[-1], period, freq))
+    dates = df.index.to_numpy()
+    horizon, positions = bar_positions(dates, ds.to_numpy())
+    params = {}
+    if engine == "seasonal_naive":
+        params["season_length"] = season_length_for(dates)
+    with span("forecast", engine=engine):
+        path, sigma = forecast_batch(df['Close'].to_numpy(), horizon, engine, **params)
+        lower, upper = forecast_interval(path, sigma)
+
+    forecast = pd.DataFrame({
+        "ds": ds,
+        "yhat": path_at(path, positions)[0],
+        "yhat_lower": path_at(lower, positions)[0],
+        "yhat_upper": path_at(upper, positions)[0],
+    })
+    return None, forecast
+
+# Function to list the period dates after last_date, the same ones Prophet's make_future_dataframe gives
+def future_dates(last_date, period, freq):
+    import pandas as pd
+
+    dates = pd.date_range(start=last_date, periods=period + 1, freq=freq.lower())
+    return dates[dates > last_date][:period]
+
+# Function to drop the regressors when the series is too short to fit on after their warm-up
+def usable_regressors(df, regressors):
+    regressors = tuple(regressors)
+    return regressors if regressors and enough_history(len(df), regressors) else ()
+
+# Function to forecast the next period bars, returns a ForecastResult without drawing anything
+# Results for a known symbol are cached by data fingerprint and horizon
+# A series too short for the regressors' warm-up is fitted without them, result.regressors tells
+def predict_trend(df, period, freq, symbol=None, series_type=None, engine="prophet", regressors=(), interval=None):
+    regressors = usable_regressors(df, regressors) if engine == "prophet" else ()
+    if symbol is None:
+        _, forecast = forecast_frame(df, period, freq, engine=engine, regressors=regressors)
+        return ForecastResult.from_frame(forecast, df.index[-1], engine, regressors)
+
+    key = (symbol, series_type, data_fingerprint(df), period, freq, engine, regressors)
+    result = forecast_cache.get(key)
+    if result is not None:
+        count_cache("forecast", "hit")
+        return result
+
+    count_cache("forecast", "miss")
+    _, forecast = forecast_frame(df, period, freq, symbol, series_type, engine, regressors, interval)
+    result = ForecastResult.from_frame(forecast, df.index[-1], engine, regressors)
+    forecast_cache.put(key, result)
+    return result
@@ -0,0 +1,75 @@
+import numpy as np
+
+# Points per trace sent to the browser, and the size past which traces switch to WebGL
+MAX_POINTS = 2000
+WEBGL_THRESHOLD = 1000
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(np.float64)
+    return x - x[0] if len(x) else x
+
+
+# Function to pick the indices kept by Largest-Triangle-Three-Buckets
+#
+# The first and last points are always kept. Every bucket in between keeps the point that
+# forms the largest triangle with the point kept from the previous bucket and the mean of
+# the next one, which preserves peaks, troughs and the overall shape of the line.
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Mean of every bucket up front; the one after the last bucket is the final point
+    sizes = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / sizes
+    mean_y = np.add.reduceat(y, edges) / sizes
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - mean_x[i + 1]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (mean_y[i + 1] - ay))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+# Function to pick the lowest and highest point of each bucket, cheaper than LTTB and never drops an extreme
+def minmax_indices(y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    buckets = (n_out - 2) // 2
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket, np.arange(buckets), side="left")
+    stops = np.searchsorted(bucket, np.arange(buckets), side="right")
+    kept = np.concatenate([[0, n - 1], order[starts], order[stops - 1]])
+    return np.unique(kept)
+
+
+DOWNSAMPLERS = {
+    "lttb": lambda x, y, n_out: lttb_indices(x, y, n_out),
+    "minmax": lambda x, y, n_out: minmax_indices(y, n_out),
+}
+
+
+# Function to reduce one series to at most max_points, returns (x, y) unchanged when it is already small
+def downsample(x, y, max_points=MAX_POINTS, method="lttb"):
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    kept = DOWNSAMPLERS[method](x, y, max_points)
+    return x[kept], y[kept]
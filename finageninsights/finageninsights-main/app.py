@@ -1,16 +1,24 @@
 import streamlit as st
-import openai
-import pandas as pd
 from datetime import datetime
 import os
+import time
+from data_index import get_data_index
+from downsample import downsample_frame
+from historical_store import build_store, compact_frame, read_manifest, read_store, source_version, store_path
+from insights import fetch_insights, stream_insights
+from llm_cache import get_shared_cache
+from metrics import count_cache, count_error, span, start_server
 
-# Initialize OpenAI API client
-class OpenAIClient:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        openai.api_key = self.api_key
+# Chat completions from the OpenAI API
+class OpenAIBackend:
+    def __init__(self, api_key=None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
 
-    def get_response(self, prompt, model="gpt-3.5-turbo", max_tokens=150):
+    def complete(self, prompt, model, max_tokens):
+        # The openai package is slow to import, load it on the first request instead of at startup
+        import openai
+
+        openai.api_key = self.api_key
         response = openai.ChatCompletion.create(
             model=model,
             messages=[
@@ -20,22 +28,159 @@ class OpenAIClient:
         )
         return response['choices'][0]['message']['content']
 
-# Initialize OpenAI client
-openai_client = OpenAIClient()
+    def stream(self, prompt, model, max_tokens):
+        import openai
+
+        openai.api_key = self.api_key
+        response = openai.ChatCompletion.create(
+            model=model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            stream=True
+        )
+        for chunk in response:
+            text = chunk['choices'][0].get('delta', {}).get('content')
+            if text:
+                yield text
+
+# Offline stand-in that answers every prompt with deterministic text, for tests and demos without network
+class StubBackend:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _text(self, prompt):
+        topic = " ".join(prompt.split()[:8])
+        return "\n".join(f"{i}. Stub insight {i} for: {topic}" for i in range(1, 4))
+
+    def complete(self, prompt, model, max_tokens):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._text(prompt)
+
+    def stream(self, prompt, model, max_tokens):
+        self.calls += 1
+        words = self._text(prompt).split(" ")
+        for i, word in enumerate(words):
+            if self.latency:
+                time.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
+
+# Initialize OpenAI API client
+class OpenAIClient:
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or OpenAIBackend()
+        self.cache = cache
+
+    def get_response(self, prompt, model="gpt-3.5-turbo", max_tokens=150):
+        if self.cache is not None:
+            cached = self.cache.get(model, prompt, max_tokens)
+            count_cache("llm", "hit" if cached is not None else "miss")
+            if cached is not None:
+                return cached
+
+        try:
+            with span("openai_request", mode="complete"):
+                response = self.backend.complete(prompt, model, max_tokens)
+        except Exception as exc:
+            count_error("openai", type(exc).__name__)
+            raise
+        if self.cache is not None:
+            self.cache.put(model, prompt, max_tokens, response)
+        return response
+
+    # Yields the response as it is generated; a cached response comes back as a single chunk
+    def stream_response(self, prompt, model="gpt-3.5-turbo", max_tokens=150):
+        if self.cache is not None:
+            cached = self.cache.get(model, prompt, max_tokens)
+            count_cache("llm", "hit" if cached is not None else "miss")
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        try:
+            with span("openai_request", mode="stream"):
+                for text in self.backend.stream(prompt, model, max_tokens):
+                    chunks.append(text)
+                    yield text
+        except Exception as exc:
+            count_error("openai", type(exc).__name__)
+            raise
+        if self.cache is not None:
+            self.cache.put(model, prompt, max_tokens, "".join(chunks))
 
-def load_data(file_path):
-    data = pd.read_csv(file_path)
+# Responses are shared by every session and kept on disk between restarts
+response_cache = get_shared_cache(
+    path=os.getenv("FINAGENT_LLM_CACHE", os.path.join(".cache", "llm_responses.sqlite3")),
+    ttl=float(os.getenv("FINAGENT_LLM_CACHE_TTL", str(24 * 60 * 60))),
+)
+
+# Stage latencies and cache/error counts on /metrics when FINAGENT_METRICS_PORT is set
+start_server()
+
+# Seconds the page waits for all of its AI insights together
+INSIGHTS_TIMEOUT = float(os.getenv("FINAGENT_INSIGHTS_TIMEOUT", "30"))
+
+# Initialize OpenAI client, FINAGENT_LLM_BACKEND=stub answers offline
+openai_client = OpenAIClient(
+    backend=StubBackend(latency=float(os.getenv("FINAGENT_STUB_LATENCY", "0"))) if os.getenv("FINAGENT_LLM_BACKEND") == "stub" else OpenAIBackend(),
+    cache=response_cache,
+)
+
+# Load from the columnar store next to the CSV, converting it once when it is missing or out of date
+def load_data(file_path, company_name=None, columns=None):
+    store_dir = store_path(file_path)
+    manifest = read_manifest(file_path, store_dir)
+    if manifest is None:
+        # A CSV pyarrow's typed parser rejects raises ArrowInvalid, a ValueError; pandas gets a go at it instead
+        try:
+            manifest = build_store(file_path, store_dir)
+        except (ImportError, OSError, ValueError):
+            manifest = None
+    if manifest is not None:
+        return read_store(store_dir, manifest, company_name, columns)
+    return load_csv(file_path, columns)
+
+# Parse the CSV directly, used when the columnar store cannot be written
+def load_csv(file_path, columns=None):
+    import pandas as pd
+
+    data = pd.read_csv(file_path, usecols=columns)
     data['Date'] = pd.to_datetime(data['Date'], utc=True)
-    return data
+    return compact_frame(data)
+
+# Columns the page reads from the historical data
+PAGE_COLUMNS = ["Date", "Close", "Volume", "Company"]
 
-def filter_data_by_company(data, company_name):
-    return data[data['Company'].str.contains(company_name, case=False, na=False)]
+# Index over every company, built once per process and rebuilt when the data changes. The store is
+# memory-mapped, so all sessions and processes share its pages instead of each reading one company
+def get_index(file_path):
+    return get_data_index(file_path, source_version(file_path), lambda: load_data(file_path, columns=PAGE_COLUMNS))
 
-def filter_data_by_years(data, start_year, end_year):
-    data['Year'] = data['Date'].dt.year
-    return data[(data['Year'] >= start_year) & (data['Year'] <= end_year)]
+def filter_data_by_company(data, company_name, index=None):
+    if index is not None:
+        return index.select(company_name)
+    return data[data['Company'].str.contains(company_name, case=False, na=False, regex=False)]
+
+def filter_data_by_years(data, start_year, end_year, index=None, company_name=None):
+    if index is not None:
+        return index.select_years(company_name, start_year, end_year)
+    years = data['Date'].dt.year
+    return data[(years >= start_year) & (years <= end_year)]
+
+# summary is a RangeMetrics.summary() for the same rows; without it the metrics are computed from data
+def display_metrics(data, summary=None):
+    if summary is None:
+        summary = {
+            "avg_close": data['Close'].mean(),
+            "total_volume": data['Volume'].sum(),
+            "max_close": data['Close'].max(),
+        }
 
-def display_metrics(data):
     st.markdown(
         """
         <style>
@@ -68,52 +213,96 @@ def display_metrics(data):
     
     st.markdown(f"""
     <div class="metric-container">
-        <div class="metric-box">Avg Close<br>${data['Close'].mean():.2f}</div>
-        <div class="metric-box">Total Volume<br>{data['Volume'].sum():,.0f}</div>
-        <div class="metric-box">Highest Close<br>${data['Close'].max():.2f}</div>
+        <div class="metric-box">Avg Close<br>${summary['avg_close']:.2f}</div>
+        <div class="metric-box">Total Volume<br>{summary['total_volume']:,.0f}</div>
+        <div class="metric-box">Highest Close<br>${summary['max_close']:.2f}</div>
     </div>
     """, unsafe_allow_html=True)
 
+# Prompts for each insight section, as (prompt, max_tokens)
+def growth_prompt(company_name):
+    return f"Provide 3 key points for {company_name} growth analysis in 3-4 words each.", 150
+
+def history_prompt(company_name):
+    return f"Summarize {company_name}'s trend in 15 words max.", 150
+
+def advice_prompt(company_name):
+    return f"Give investment advice for {company_name} in 10 words max.", 150
+
+def news_prompt(company_name, start_date, end_date):
+    return f"Provide a summary of the top 3 news articles affecting {company_name} between {start_date} and {end_date}. Include the headline and a brief description.", 300
+
 def get_growth_analysis(company_name):
-    prompt = f"Provide 3 key points for {company_name} growth analysis in 3-4 words each."
-    response = openai_client.get_response(prompt)
+    prompt, max_tokens = growth_prompt(company_name)
+    response = openai_client.get_response(prompt, max_tokens=max_tokens)
     return response.split("\n")
 
 def get_history_and_advice(company_name):
-    history_prompt = f"Summarize {company_name}'s trend in 15 words max."
-    advice_prompt = f"Give investment advice for {company_name} in 10 words max."
-    
-    history = openai_client.get_response(history_prompt)
-    advice = openai_client.get_response(advice_prompt)
-    
-    return history, advice
+    # Both prompts go out together, so this takes one round-trip instead of two
+    results = fetch_insights(openai_client, {
+        "history": history_prompt(company_name),
+        "advice": advice_prompt(company_name),
+    }, timeout=INSIGHTS_TIMEOUT)
+    return results["history"], results["advice"]
 
 def get_news_summary(company_name, start_date, end_date):
-    prompt = f"Provide a summary of the top 3 news articles affecting {company_name} between {start_date} and {end_date}. Include the headline and a brief description."
-    response = openai_client.get_response(prompt, max_tokens=300)
+    prompt, max_tokens = news_prompt(company_name, start_date, end_date)
+    response = openai_client.get_response(prompt, max_tokens=max_tokens)
     return response
 
+def render_growth(slot, text):
+    lines = "\n".join(f"- {point}" for point in text.split("\n") if point.strip())
+    slot.markdown(f"**Growth Points:**\n\n{lines}")
+
+def render_news(slot, text):
+    items = "".join(f'<div class="news-item">{article.strip()}</div>' for article in text.split("\n")[:3])
+    slot.markdown(f'<div class="news-container">{items}</div>', unsafe_allow_html=True)
+
+# Function to dispatch every insight prompt of the page at once and fill each slot as tokens stream in
+def render_insights(prompts, slots, renderers):
+    texts = {name: "" for name in prompts}
+    for name, kind, text in stream_insights(openai_client, prompts, timeout=INSIGHTS_TIMEOUT):
+        if kind == "chunk":
+            texts[name] += text
+            renderers[name](slots[name], texts[name])
+        elif kind == "done":
+            if text:
+                renderers[name](slots[name], text)
+            elif name == "news":
+                slots[name].write("No news articles found for the selected period.")
+        elif kind == "error":
+            slots[name].error(f"Could not load this insight: {text}")
+        else:
+            slots[name].warning("This insight timed out." if not text else f"{text} …(timed out)")
+
 def main():
     st.title("FinAgent Insight")
 
     file_path = "updated_file.csv"
-    data = load_data(file_path)
 
     company_name = st.text_input("Company Name:")
 
     if company_name:
-        company_data = filter_data_by_company(data, company_name)
+        index = get_index(file_path)
+        company_data = filter_data_by_company(index.data, company_name, index=index)
 
         st.subheader("Company Overview")
-        display_metrics(company_data)
+        display_metrics(company_data, summary=index.metrics.summary(index.row_ranges(company_name)))
 
         st.subheader("Stock Trend")
         start_year, end_year = st.slider(
             "Select Year Range", min_value=2000, max_value=2024, value=(2010, 2024)
         )
 
-        filtered_data = filter_data_by_years(company_data, start_year, end_year)
-        st.line_chart(filtered_data.set_index('Date')['Close'])
+        filtered_data = filter_data_by_years(company_data, start_year, end_year, index=index, company_name=company_name)
+        st.line_chart(downsample_frame(filtered_data, 'Close').set_index('Date')['Close'])
+
+        period = index.metrics.summary(index.year_ranges(company_name, start_year, end_year))
+        if period["count"]:
+            period_stats = f"{start_year}–{end_year}: low ${period['min_close']:.2f} · high ${period['max_close']:.2f} · VWAP ${period['vwap']:.2f}"
+            if period["return"] == period["return"]:
+                period_stats += f" · return {period['return']:+.1%}"
+            st.caption(period_stats)
 
         st.subheader("AI Insights")
 
@@ -155,16 +344,21 @@ def main():
             """, unsafe_allow_html=True
         )
 
+        # Every insight on the page is requested at once below; these slots fill in as the answers stream
+        prompts, slots, renderers = {}, {}, {}
+
         st.markdown('<div class="button-container">', unsafe_allow_html=True)
         if st.button("Growth Analysis"):
-            growth_points = get_growth_analysis(company_name)
-            st.write(f"**Growth Points:**")
-            for point in growth_points:
-                st.write(f"- {point}")
+            prompts["growth"] = growth_prompt(company_name)
+            slots["growth"] = st.empty()
+            renderers["growth"] = render_growth
         if st.button("History & Advice"):
-            history, advice = get_history_and_advice(company_name)
-            st.write(f"**History:** {history}")
-            st.write(f"**Advice:** {advice}")
+            prompts["history"] = history_prompt(company_name)
+            prompts["advice"] = advice_prompt(company_name)
+            slots["history"] = st.empty()
+            slots["advice"] = st.empty()
+            renderers["history"] = lambda slot, text: slot.write(f"**History:** {text}")
+            renderers["advice"] = lambda slot, text: slot.write(f"**Advice:** {text}")
         st.markdown('</div>', unsafe_allow_html=True)
 
         st.subheader("Top News")
@@ -172,7 +366,7 @@ def main():
         # Convert year range to date format
         start_date = datetime(start_year, 1, 1).strftime('%Y-%m-%d')
         end_date = datetime(end_year, 12, 31).strftime('%Y-%m-%d')
-        news_summary = get_news_summary(company_name, start_date, end_date)
+        prompts["news"] = news_prompt(company_name, start_date, end_date)
         
         # Apply CSS for responsive and justified content with pastel colors
         st.markdown(
@@ -203,17 +397,18 @@ def main():
             """, unsafe_allow_html=True
         )
         
-        if news_summary:
-            st.markdown('<div class="news-container">', unsafe_allow_html=True)
-            news_items = news_summary.split("\n")
-            for article in news_items[:3]:
-                st.markdown(f'<div class="news-item">{article.strip()}</div>', unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-        else:
-            st.write("No news articles found for the selected period.")
+        slots["news"] = st.empty()
+        renderers["news"] = render_news
+
+        render_insights(prompts, slots, renderers)
 
     else:
         st.warning("Please enter a company name.")
 
+    with st.sidebar.expander("AI response cache"):
+        st.json(response_cache.stats())
+    with st.sidebar.expander("Dataset memory"):
+        st.json(get_index(file_path).memory_report())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,155 @@
+import threading
+
+import numpy as np
+
+
+def _utc_nanos(value):
+    import pandas as pd
+
+    stamp = pd.Timestamp(value)
+    stamp = stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+    return stamp.value
+
+
+# Function to tell whether a column's values live in memory owned outside numpy, i.e. the store's mapped pages
+def _is_mapped(column):
+    import pandas as pd
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        values = column.cat.codes.to_numpy()
+    elif isinstance(column.dtype, pd.DatetimeTZDtype):
+        values = column.array.asi8
+    else:
+        values = column.to_numpy()
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return values.base is not None
+
+
+class DataIndex:
+    """Row index over the historical data for company and date filters.
+
+    Rows are sorted once by (company, date), so every company is a contiguous
+    row range with its dates in order. Company lookups scan the small set of
+    distinct names instead of every row, and date filters are a binary search
+    that returns an ``iloc`` slice of the sorted frame. Data read from the store
+    is already in that order and is kept as is, so it stays a view of the
+    memory-mapped file shared by every session of the process.
+    """
+
+    def __init__(self, data):
+        import pandas as pd
+
+        codes, names = pd.factorize(data["Company"], sort=True)
+        dates = pd.DatetimeIndex(data["Date"]).asi8
+        steps = np.diff(codes)
+        if not ((steps > 0) | ((steps == 0) & (np.diff(dates) >= 0))).all():
+            data = data.sort_values(["Company", "Date"], kind="mergesort").reset_index(drop=True)
+            codes, names = pd.factorize(data["Company"], sort=True)
+            dates = pd.DatetimeIndex(data["Date"]).asi8
+        self.data = data
+
+        starts = np.searchsorted(codes, np.arange(len(names)), side="left")
+        stops = np.searchsorted(codes, np.arange(len(names)), side="right")
+        self.ranges = {str(name): (int(start), int(stop)) for name, start, stop in zip(names, starts, stops)}
+        self._lowered = [(str(name).lower(), str(name)) for name in names]
+        self._dates = dates
+        self._metrics = None
+
+    # Prefix aggregates over the same row order, built on first use
+    @property
+    def metrics(self):
+        if self._metrics is None:
+            from range_metrics import RangeMetrics
+
+            self._metrics = RangeMetrics(self.data)
+        return self._metrics
+
+    # Bytes held per column, how many of them are mapped from the store rather than copied, and the index overhead
+    def memory_report(self):
+        columns = {}
+        for name in self.data.columns:
+            column = self.data[name]
+            columns[name] = {
+                "dtype": str(column.dtype),
+                "bytes": int(column.memory_usage(index=False, deep=True)),
+                "mapped": _is_mapped(column),
+            }
+
+        # The date keys are usually a view of the Date column and then cost nothing extra
+        index_bytes = 0 if np.may_share_memory(self._dates, self.data["Date"].array.asi8) else self._dates.nbytes
+        if self._metrics is not None:
+            index_bytes += self._metrics.nbytes
+        data_bytes = sum(column["bytes"] for column in columns.values())
+        mapped_bytes = sum(column["bytes"] for column in columns.values() if column["mapped"])
+        return {
+            "rows": len(self.data),
+            "companies": len(self.ranges),
+            "data_bytes": data_bytes,
+            "mapped_bytes": mapped_bytes,
+            "private_bytes": data_bytes - mapped_bytes + index_bytes,
+            "index_bytes": index_bytes,
+            "columns": columns,
+        }
+
+    def companies(self, company_name=None):
+        if not company_name:
+            return list(self.ranges)
+        needle = company_name.lower()
+        return [name for lowered, name in self._lowered if needle in lowered]
+
+    # Row ranges for the matching companies, narrowed to [start, end) when dates are given
+    def row_ranges(self, company_name=None, start=None, end=None):
+        ranges = []
+        for name in self.companies(company_name):
+            first, last = self.ranges[name]
+            dates = self._dates[first:last]
+            if start is not None:
+                first += int(np.searchsorted(dates, _utc_nanos(start), side="left"))
+            if end is not None:
+                last = self.ranges[name][0] + int(np.searchsorted(dates, _utc_nanos(end), side="left"))
+            if last > first:
+                ranges.append((first, last))
+        return ranges
+
+    def select(self, company_name=None, start=None, end=None):
+        ranges = self.row_ranges(company_name, start, end)
+        if not ranges:
+            return self.data.iloc[0:0]
+
+        # Companies next to each other in sort order collapse into one slice
+        merged = [list(ranges[0])]
+        for first, last in ranges[1:]:
+            if first == merged[-1][1]:
+                merged[-1][1] = last
+            else:
+                merged.append([first, last])
+        if len(merged) == 1:
+            return self.data.iloc[merged[0][0]:merged[0][1]]
+
+        import pandas as pd
+
+        return pd.concat([self.data.iloc[first:last] for first, last in merged])
+
+    def select_years(self, company_name, start_year, end_year):
+        return self.select(company_name, f"{start_year}-01-01", f"{end_year + 1}-01-01")
+
+    def year_ranges(self, company_name, start_year, end_year):
+        return self.row_ranges(company_name, f"{start_year}-01-01", f"{end_year + 1}-01-01")
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Function to build the index once per process and data version; load returns the full dataset
+def get_data_index(key, version, load):
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    index = DataIndex(load())
+    with _indexes_lock:
+        _indexes[key] = (version, index)
+    return index
@@ -0,0 +1,46 @@
+import numpy as np
+
+# Points sent to st.line_chart; the year slider narrows the range, so zooming in gets more detail
+MAX_POINTS = 1500
+
+
+# Function to pick the indices kept by Largest-Triangle-Three-Buckets
+#
+# The first and last points are always kept, every bucket in between keeps the point forming
+# the largest triangle with the previous kept point and the next bucket's mean.
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x[0]
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Mean of every bucket up front; the one after the last bucket is the final point
+    sizes = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / sizes
+    mean_y = np.add.reduceat(y, edges) / sizes
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - mean_x[i + 1]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (mean_y[i + 1] - ay))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+# Function to reduce a Date/value frame to at most max_points rows for charting
+def downsample_frame(data, column, max_points=MAX_POINTS):
+    if len(data) <= max_points:
+        return data
+    import pandas as pd
+
+    x = pd.DatetimeIndex(data["Date"]).asi8
+    return data.iloc[lttb_indices(x, data[column].to_numpy(), max_points)]
@@ -0,0 +1,190 @@
+"""Columnar store for the historical price CSV.
+
+The CSV is converted once into a single Arrow IPC file sorted by (company,
+date), with float32 prices and a dictionary-encoded company, plus a small
+manifest with every company's row range. Reads memory-map the file and slice
+the matching companies, so the numeric columns handed to pandas point straight
+into the mapped pages: read-only, never copied, and shared through the page
+cache by every worker process on the host.
+
+    python historical_store.py updated_file.csv
+"""
+import argparse
+import json
+import os
+
+MANIFEST = "manifest.json"
+DATA_FILE = "data.arrow"
+
+# Bumped whenever the file layout changes, an older store is rebuilt
+STORE_FORMAT = 2
+
+# Prices fit float32 (about 7 significant digits); sums over them are done in float64
+COLUMN_TYPES = {
+    "Date": ("timestamp", "ns", "UTC"),
+    "Open": "float32",
+    "High": "float32",
+    "Low": "float32",
+    "Close": "float32",
+    "Volume": "int64",
+    "Dividends": "float32",
+    "Stock Splits": "float32",
+    "Company": "string",
+}
+
+
+def store_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".store"
+
+
+def _arrow_types():
+    import pyarrow as pa
+
+    types = {}
+    for name, kind in COLUMN_TYPES.items():
+        types[name] = pa.timestamp(kind[1], tz=kind[2]) if isinstance(kind, tuple) else pa.type_for_alias(kind)
+    return types
+
+
+# Function to give a pandas frame the store's compact types: float32 prices and a categorical company
+def compact_frame(data):
+    for name, kind in COLUMN_TYPES.items():
+        if name not in data:
+            continue
+        if kind == "float32" and data[name].dtype != "float32":
+            data[name] = data[name].astype("float32")
+        elif name == "Company" and data[name].dtype != "category":
+            data[name] = data[name].astype("category")
+    return data
+
+
+# Function to convert the CSV into one sorted Arrow IPC file with every company's row range
+def build_store(csv_path, store_dir=None):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+
+    store_dir = store_dir or store_path(csv_path)
+    os.makedirs(store_dir, exist_ok=True)
+
+    table = pa_csv.read_csv(csv_path, convert_options=pa_csv.ConvertOptions(column_types=_arrow_types()))
+    table = table.filter(pc.is_valid(table.column("Company")))
+    table = table.sort_by([("Company", "ascending"), ("Date", "ascending")])
+
+    # Counts come in order of first appearance, which in the sorted table is row order
+    companies = {}
+    offset = 0
+    for count in pc.value_counts(table.column("Company")).to_pylist():
+        companies[count["values"]] = {"offset": offset, "rows": count["counts"]}
+        offset += count["counts"]
+
+    # A dictionary-encoded company column comes back to pandas as a categorical
+    table = table.set_column(table.schema.get_field_index("Company"), "Company", pc.dictionary_encode(table.column("Company")))
+    # One record batch, so every column maps to one contiguous buffer pandas can use as is
+    table = table.combine_chunks()
+
+    tmp_path = os.path.join(store_dir, DATA_FILE + ".tmp")
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, os.path.join(store_dir, DATA_FILE))
+    # Per-company files written by the first store format
+    for name in os.listdir(store_dir):
+        if name.endswith(".arrow") and name != DATA_FILE:
+            os.remove(os.path.join(store_dir, name))
+
+    stat = os.stat(csv_path)
+    manifest = {
+        "format": STORE_FORMAT,
+        "source": os.path.basename(csv_path),
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "columns": list(table.column_names),
+        "companies": companies,
+    }
+    with open(os.path.join(store_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# Function to read the manifest, returns None when the store is missing or older than the CSV
+def read_manifest(csv_path, store_dir=None):
+    store_dir = store_dir or store_path(csv_path)
+    try:
+        with open(os.path.join(store_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != STORE_FORMAT:
+        return None
+
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        # Only the store was deployed, trust it
+        return manifest
+    if stat.st_size != manifest["source_size"] or stat.st_mtime != manifest["source_mtime"]:
+        return None
+    return manifest
+
+
+# Function to identify the version of the data, (size, mtime) of the CSV or, when only the store
+# was deployed, of the CSV it was built from; None when there is neither
+def source_version(csv_path, store_dir=None):
+    try:
+        stat = os.stat(csv_path)
+        return stat.st_size, stat.st_mtime
+    except OSError:
+        manifest = read_manifest(csv_path, store_dir)
+        return None if manifest is None else (manifest["source_size"], manifest["source_mtime"])
+
+
+def matching_companies(manifest, company_name=None):
+    if not company_name:
+        return list(manifest["companies"])
+    needle = company_name.lower()
+    return [company for company in manifest["companies"] if needle in company.lower()]
+
+
+# Function to memory-map the store and return the rows of the matching companies, only the requested columns
+def read_store(store_dir, manifest, company_name=None, columns=None):
+    import pyarrow as pa
+
+    companies = matching_companies(manifest, company_name)
+    if not companies:
+        types = _arrow_types()
+        schema = pa.schema([(name, types[name]) for name in (columns or manifest["columns"])])
+        return compact_frame(schema.empty_table().to_pandas())
+
+    with pa.memory_map(os.path.join(store_dir, DATA_FILE), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns:
+        table = table.select(columns)
+
+    # Companies next to each other in the file collapse into one zero-copy slice
+    ranges = []
+    for company in companies:
+        offset, rows = manifest["companies"][company]["offset"], manifest["companies"][company]["rows"]
+        if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+            ranges[-1][1] += rows
+        else:
+            ranges.append([offset, rows])
+    if len(ranges) == 1:
+        table = table.slice(*ranges[0])
+    else:
+        table = pa.concat_tables([table.slice(offset, rows) for offset, rows in ranges]).combine_chunks()
+    return table.to_pandas(split_blocks=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the historical price CSV into the columnar store.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--store", default=None, help="output directory, defaults to <csv name>.store")
+    args = parser.parse_args()
+
+    manifest = build_store(args.csv_path, args.store)
+    rows = sum(company["rows"] for company in manifest["companies"].values())
+    print(f"{len(manifest['companies'])} companies, {rows} rows -> {args.store or store_path(args.csv_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Function to run every prompt at once and yield (name, kind, text) events as tokens arrive
+#
+# prompts maps a section name to (prompt, max_tokens). Events are ("chunk", text) while a
+# section streams, then ("done", full_text), ("error", message) or ("timeout", partial_text).
+# Worker threads never touch Streamlit, only the caller's thread renders.
+def stream_insights(client, prompts, timeout=30.0):
+    if not prompts:
+        return
+
+    events = queue.Queue()
+
+    def run(name, prompt, max_tokens):
+        try:
+            for text in client.stream_response(prompt, max_tokens=max_tokens):
+                events.put((name, "chunk", text))
+            events.put((name, "done", None))
+        except Exception as exc:
+            events.put((name, "error", f"{type(exc).__name__}: {exc}"))
+
+    executor = ThreadPoolExecutor(max_workers=len(prompts))
+    texts = {name: "" for name in prompts}
+    pending = set(prompts)
+    deadline = time.monotonic() + timeout
+    try:
+        for name, (prompt, max_tokens) in prompts.items():
+            executor.submit(run, name, prompt, max_tokens)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                name, kind, text = events.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if kind == "chunk":
+                texts[name] += text
+                yield name, "chunk", text
+            elif kind == "done":
+                pending.discard(name)
+                yield name, "done", texts[name]
+            else:
+                pending.discard(name)
+                yield name, "error", text
+
+        for name in pending:
+            yield name, "timeout", texts[name]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Function to run every prompt at once and return {name: full_text}, None for sections that failed
+def fetch_insights(client, prompts, timeout=30.0):
+    results = {name: None for name in prompts}
+    for name, kind, text in stream_insights(client, prompts, timeout):
+        if kind == "done":
+            results[name] = text
+    return results
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LLM responses keyed by (model, prompt, max_tokens), with TTL and LRU eviction.
+
+    A small in-memory LRU sits in front of a SQLite file, so entries are shared
+    by every session in the process, by other worker processes on the same
+    host, and survive restarts. Pass ``path=None`` for a memory-only cache.
+    """
+
+    def __init__(self, path=None, ttl=24 * 60 * 60, maxsize=1000, memory_size=256):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, used_at REAL NOT NULL)"
+                )
+
+    @staticmethod
+    def make_key(model, prompt, max_tokens):
+        return hashlib.sha256(f"{model}\0{max_tokens}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model, prompt, max_tokens):
+        key = self.make_key(model, prompt, max_tokens)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                entry = tuple(row) if row else None
+
+            if entry is not None and now - entry[1] >= self.ttl:
+                self._forget(key)
+                self.expired += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._remember(key, entry)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            return entry[0]
+
+    def put(self, model, prompt, max_tokens, response):
+        key = self.make_key(model, prompt, max_tokens)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (response, now))
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, created_at, used_at) VALUES (?, ?, ?, ?)",
+                        (key, response, now, now),
+                    )
+                    # Least recently used rows beyond maxsize are dropped
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                        (self.maxsize,),
+                    )
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > min(self.memory_size, self.maxsize):
+            self._memory.popitem(last=False)
+
+    def _forget(self, key):
+        self._memory.pop(key, None)
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries_in_memory": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM responses")
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+# Function to get one cache per (path, ttl) per process; Streamlit re-executes the page script on
+# every rerun, so a cache created there would start empty each time
+def get_shared_cache(path=None, ttl=24 * 60 * 60, maxsize=1000):
+    with _shared_lock:
+        cache = _shared_caches.get((path, ttl))
+        if cache is None:
+            cache = _shared_caches[(path, ttl)] = ResponseCache(path, ttl=ttl, maxsize=maxsize)
+        return cache
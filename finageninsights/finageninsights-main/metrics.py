@@ -0,0 +1,243 @@
+"""Stage timings, cache and error counters, exposed on /metrics in the Prometheus text format.
+
+This file is canonical. finageninsights/finageninsights-main/metrics.py is a
+byte-for-byte copy, because that app is deployed on its own and cannot import
+from the repository root. Edit this file and copy it over, never the other way.
+"""
+import bisect
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# FINAGENT_METRICS=0 turns every span and counter into a no-op
+ENABLED = os.getenv("FINAGENT_METRICS", "1") != "0"
+
+# Upper bounds in seconds, from a cache read up to a cold Prophet fit
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    "stage_seconds": "Time spent in each stage of a page.",
+    "cache_requests_total": "Cache lookups by cache and result.",
+    "cache_hit_ratio": "Share of cache lookups answered from the cache.",
+    "upstream_errors_total": "Failed upstream calls by upstream and kind.",
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Registry:
+    """Process-wide histograms, counters and gauge collectors, rendered as Prometheus text.
+
+    Collectors are callables returning ``(name, labels, value)`` gauges read at
+    scrape time, for numbers another object already keeps (queue depth, quota).
+    """
+
+    def __init__(self, prefix="finagent"):
+        self.prefix = prefix
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def counter_values(self, name):
+        with self._lock:
+            return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    # Hit ratio per cache from the cache_requests_total counters
+    def _hit_ratios(self):
+        totals, hits = {}, {}
+        for labels, value in self.counter_values("cache_requests_total").items():
+            labels = dict(labels)
+            cache = labels.get("cache")
+            totals[cache] = totals.get(cache, 0) + value
+            if labels.get("result") == "hit":
+                hits[cache] = hits.get(cache, 0) + value
+        return [("cache_hit_ratio", {"cache": cache}, hits.get(cache, 0) / total) for cache, total in totals.items() if total]
+
+    def render(self):
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            collectors = list(self._collectors)
+
+        gauges = self._hit_ratios()
+        for collector in collectors:
+            try:
+                gauges.extend(collector())
+            except Exception:
+                continue
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                help_text = METRIC_HELP.get(name, name.replace("_", " ").capitalize() + ".")
+                lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+
+        for (name, labels), histogram in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.prefix}_{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{self.prefix}_{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{self.prefix}_{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{self.prefix}_{name}{_format_labels(labels)} {value}")
+
+        for name, labels, value in sorted(gauges, key=lambda gauge: (gauge[0], sorted(gauge[1].items()))):
+            describe(name, "gauge")
+            lines.append(f"{self.prefix}_{name}{_format_labels(tuple(sorted(labels.items())))} {float(value):.6g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+registry = Registry()
+
+
+class _Span:
+    __slots__ = ("labels", "started")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe("stage_seconds", time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+_NOOP = contextlib.nullcontext()
+
+
+# Function to time a block as one stage: with span("parse"): ...
+def span(stage, **labels):
+    if not ENABLED:
+        return _NOOP
+    return _Span(dict(labels, stage=stage))
+
+
+# Function to time every call of the decorated function as one stage
+def timed(stage, **labels):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(dict(labels, stage=stage)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Function to count one cache lookup; result is hit, miss, stale or expired
+def count_cache(cache, result):
+    if ENABLED:
+        registry.inc("cache_requests_total", cache=cache, result=result)
+
+
+# Function to count one failed upstream call
+def count_error(upstream, kind):
+    if ENABLED:
+        registry.inc("upstream_errors_total", upstream=upstream, kind=kind)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+# Function to serve /metrics from a background thread; the port comes from FINAGENT_METRICS_PORT when not given
+def start_server(port=None, host=None):
+    global _server
+    port = port if port is not None else os.getenv("FINAGENT_METRICS_PORT")
+    if not ENABLED or port in (None, ""):
+        return None
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            server = ThreadingHTTPServer((host or os.getenv("FINAGENT_METRICS_HOST", "127.0.0.1"), int(port)), _MetricsHandler)
+        except OSError as exc:
+            # Another worker on this host already serves the port
+            logger.warning("metrics endpoint not started on port %s: %s", port, exc)
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        _server = server
+        return server
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class _SegmentTree:
+    """Bottom-up segment tree answering max or min over [start, stop) in O(log n)."""
+
+    def __init__(self, values, op, identity):
+        self.op = op
+        self.identity = identity
+        self.size = 1 << max(0, (len(values) - 1).bit_length())
+        tree = np.full(2 * self.size, identity, dtype=np.float64)
+        tree[self.size:self.size + len(values)] = values
+
+        # Fill one level at a time, each level is a single vectorized op
+        ufunc = np.maximum if op is max else np.minimum
+        lo = self.size
+        while lo > 1:
+            hi, lo = lo, lo // 2
+            tree[lo:hi] = ufunc(tree[2 * lo:2 * hi:2], tree[2 * lo + 1:2 * hi:2])
+        self.tree = tree
+
+    def query(self, start, stop):
+        result = self.identity
+        start += self.size
+        stop += self.size
+        while start < stop:
+            if start & 1:
+                result = self.op(result, self.tree[start])
+                start += 1
+            if stop & 1:
+                stop -= 1
+                result = self.op(result, self.tree[stop])
+            start >>= 1
+            stop >>= 1
+        return float(result)
+
+
+class RangeMetrics:
+    """Precomputed aggregates over the index's row order for constant-time range stats.
+
+    Prefix sums give the mean close, total volume and VWAP of any row range in
+    O(1); segment trees give the highest and lowest close in O(log n). Ranges
+    come from ``DataIndex.row_ranges`` and several ranges (several matching
+    companies) are combined.
+    """
+
+    def __init__(self, data):
+        # The close column is kept as given (a float32 view of the store); the sums accumulate in float64
+        close = data["Close"].to_numpy()
+        volume = data["Volume"].to_numpy()
+        self.close = close
+        self.cum_close = np.concatenate([[0.0], np.cumsum(close, dtype=np.float64)])
+        self.cum_volume = np.concatenate([[0.0], np.cumsum(volume, dtype=np.float64)])
+        self.cum_dollar_volume = np.concatenate([[0.0], np.cumsum(close.astype(np.float64) * volume)])
+        self.max_close = _SegmentTree(close, max, -np.inf)
+        self.min_close = _SegmentTree(close, min, np.inf)
+
+    @property
+    def nbytes(self):
+        arrays = (self.close, self.cum_close, self.cum_volume, self.cum_dollar_volume, self.max_close.tree, self.min_close.tree)
+        return sum(array.nbytes for array in arrays)
+
+    def summary(self, ranges):
+        count = sum(stop - start for start, stop in ranges)
+        if not count:
+            return {
+                "count": 0, "avg_close": float("nan"), "total_volume": 0.0, "max_close": float("nan"),
+                "min_close": float("nan"), "vwap": float("nan"), "return": float("nan"),
+            }
+
+        close_sum = sum(self.cum_close[stop] - self.cum_close[start] for start, stop in ranges)
+        volume = sum(self.cum_volume[stop] - self.cum_volume[start] for start, stop in ranges)
+        dollar_volume = sum(self.cum_dollar_volume[stop] - self.cum_dollar_volume[start] for start, stop in ranges)
+
+        # Return over the period only makes sense for a single company's range
+        period_return = float("nan")
+        if len(ranges) == 1:
+            start, stop = ranges[0]
+            period_return = float(self.close[stop - 1]) / float(self.close[start]) - 1
+
+        return {
+            "count": count,
+            "avg_close": close_sum / count,
+            "total_volume": volume,
+            "max_close": max(self.max_close.query(start, stop) for start, stop in ranges),
+            "min_close": min(self.min_close.query(start, stop) for start, stop in ranges),
+            "vwap": dollar_volume / volume if volume else float("nan"),
+            "return": float(period_return),
+        }
@@ -0,0 +1,153 @@
+"""NumPy-only forecasting engines for quick "next bar up or down" answers.
+
+Every engine takes a 2-D array of closes shaped (n_series, n_obs), one series
+per row, and returns ``(path, sigma)``:
+
+* ``path`` is shaped (n_series, horizon + 1). Column 0 is the model's value at
+  the last observed bar and columns 1..horizon are the forecast, so the slope
+  of the last step is always ``path[:, -1] - path[:, -2]``.
+* ``sigma`` is the per-series standard deviation of the one-step errors, used
+  to draw intervals that widen with sqrt(h).
+
+Prophet stays the "accurate" engine in ``data_processing``; these fit in
+milliseconds and run over many series in one call.
+"""
+import numpy as np
+
+# Season length used by the seasonal-naive engine for each bar frequency
+SEASON_LENGTH = {"H": 24, "D": 5, "W": 52, "M": 12}
+
+# Bars of one day or longer in a series whose spacing is below each bound, widest last
+_BAR_FREQUENCIES = ((np.timedelta64(4, "D"), "D"), (np.timedelta64(20, "D"), "W"))
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+
+# Function to fit a least-squares linear trend to every row at once
+def ols_forecast(values, horizon):
+    values = _as_2d(values)
+    n = values.shape[1]
+    t = np.arange(n, dtype=np.float64)
+    t_centered = t - t.mean()
+    y_mean = values.mean(axis=1, keepdims=True)
+
+    slope = ((values - y_mean) @ t_centered) / (t_centered @ t_centered)
+    intercept = y_mean[:, 0] - slope * t.mean()
+
+    steps = np.arange(n - 1, n + horizon, dtype=np.float64)
+    path = intercept[:, np.newaxis] + slope[:, np.newaxis] * steps
+    residuals = values - (intercept[:, np.newaxis] + slope[:, np.newaxis] * t)
+    sigma = residuals.std(axis=1, ddof=min(2, n - 1))
+    return path, sigma
+
+
+# Function to run Holt's linear (double exponential) smoothing over every row at once
+def holt_forecast(values, horizon, alpha=0.5, beta=0.1):
+    values = _as_2d(values)
+    level = values[:, 0].copy()
+    trend = values[:, 1] - values[:, 0] if values.shape[1] > 1 else np.zeros(len(values))
+    errors = np.zeros(len(values))
+
+    # The recursion runs over time, each step is vectorized over the series
+    for column in values.T[1:]:
+        predicted = level + trend
+        errors += (column - predicted) ** 2
+        new_level = alpha * column + (1 - alpha) * predicted
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+
+    steps = np.arange(horizon + 1, dtype=np.float64)
+    path = level[:, np.newaxis] + trend[:, np.newaxis] * steps
+    sigma = np.sqrt(errors / max(values.shape[1] - 1, 1))
+    return path, sigma
+
+
+# Function to repeat the last observed season; falls back to the last value for short series
+def seasonal_naive_forecast(values, horizon, season_length=52):
+    values = _as_2d(values)
+    n = values.shape[1]
+    if season_length >= n:
+        season_length = 1
+
+    steps = np.arange(1, horizon + 1)
+    source = n - season_length + (steps - 1) % season_length
+    path = np.concatenate([values[:, -1:], values[:, source]], axis=1)
+
+    diffs = values[:, season_length:] - values[:, :-season_length]
+    sigma = diffs.std(axis=1) if diffs.shape[1] > 1 else np.zeros(len(values))
+    return path, sigma
+
+
+ENGINES = {
+    "ols": ols_forecast,
+    "holt": holt_forecast,
+    "seasonal_naive": seasonal_naive_forecast,
+}
+
+# Engines the UI can offer, "prophet" is handled by data_processing
+ENGINE_CHOICES = ["prophet", *ENGINES]
+
+
+def forecast_batch(values, horizon, engine="ols", **params):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown forecasting engine {engine!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[engine](values, horizon, **params)
+
+
+# Function to return the typical spacing of a series' bars, None for fewer than two bars
+def bar_step(dates):
+    spacing = np.diff(np.asarray(dates, dtype="datetime64[ns]")[-64:]).astype(np.int64)
+    return np.timedelta64(int(np.median(spacing)), "ns") if len(spacing) else None
+
+
+# Function to pick the seasonal-naive season from the bars themselves: a typical trading day of
+# bars for intraday series, otherwise the SEASON_LENGTH of the bar frequency
+def season_length_for(dates):
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    step = bar_step(dates)
+    if step is None:
+        return 1
+    if step < np.timedelta64(1, "D"):
+        _, per_day = np.unique(dates[-2000:].astype("datetime64[D]"), return_counts=True)
+        return max(1, int(np.median(per_day)))
+    for bound, freq in _BAR_FREQUENCIES:
+        if step < bound:
+            return SEASON_LENGTH[freq]
+    return SEASON_LENGTH["M"]
+
+
+# Function to place requested dates on a series' bars: returns the horizon in bars that covers the
+# last target and each target's fractional position in bars after the last observed bar
+def bar_positions(dates, targets):
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    targets = np.asarray(targets, dtype="datetime64[ns]")
+    step = bar_step(dates)
+    if step is None:
+        # A single bar has no spacing, take every requested step as one bar
+        positions = np.arange(len(targets), dtype=np.float64) + (targets[0] > dates[-1])
+    else:
+        positions = (targets - dates[-1]).astype(np.int64) / step.astype(np.int64)
+    return max(1, int(np.ceil(positions.max()))), positions
+
+
+# Function to read paths shaped (n_series, horizon + 1) at fractional bar positions, linear between bars
+# positions is shared by every row, or shaped (n_series, k) with one row of positions per series
+def path_at(path, positions):
+    steps = np.arange(path.shape[1])
+    positions = np.broadcast_to(positions, (path.shape[0], np.shape(positions)[-1]))
+    return np.stack([np.interp(row_positions, steps, row) for row_positions, row in zip(positions, path)])
+
+
+# Function to turn a forecast path into lower / upper interval bounds
+def forecast_interval(path, sigma, z=1.96):
+    width = z * sigma[:, np.newaxis] * np.sqrt(np.arange(path.shape[1]))
+    return path - width, path + width
+
+
+# Function to compute the Up / Down / Neutral direction of every row at once
+def path_directions(path):
+    last_trend = np.sign(path[:, -1] - path[:, -2])
+    return np.array(["Down", "Neutral", "Up"])[last_trend.astype(int) + 1]
@@ -0,0 +1,217 @@
+"""Technical indicators over many aligned series, updated incrementally as bars arrive.
+
+Closes are a 2-D array shaped (n_series, n_obs), one series per row on a shared
+calendar (NaN where a series has no bar). Every indicator is kept as an array
+of the same shape. ``Indicators.append`` carries the moving-average, RSI and
+MACD state forward and only looks at the new bars plus the last window of
+closes, so refreshing a cached series costs O(new bars), not O(history).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Indicator columns offered by the pages, by group; oscillators get their own chart row
+GROUPS = {
+    "SMA": ("sma_20", "sma_50"),
+    "EMA": ("ema_20",),
+    "Bollinger": ("bb_upper", "bb_mid", "bb_lower"),
+    "RSI": ("rsi_14",),
+    "MACD": ("macd", "macd_signal", "macd_hist"),
+}
+OSCILLATORS = ("RSI", "MACD")
+
+# Columns that make sense as Prophet regressors: bounded or mean-reverting, not a copy of the price
+REGRESSOR_CHOICES = ("rsi_14", "macd", "macd_hist")
+
+# Bars a series needs before each column has a value, with the default Indicators parameters
+WARMUP = {
+    "sma_20": 20, "sma_50": 50, "ema_20": 20, "rsi_14": 15,
+    "macd": 26, "macd_signal": 34, "macd_hist": 34,
+    "bb_upper": 20, "bb_mid": 20, "bb_lower": 20,
+}
+
+CACHE_SIZE = 64
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+
+# Function to run an exponential moving average over a block, seeded with the state of the bars before it
+# NaN inputs are skipped and repeat the previous value, as pandas' ewm(adjust=False, ignore_na=True)
+def _ema(state, block, alpha):
+    import pandas as pd
+
+    seeded = np.concatenate([state[:, np.newaxis], block], axis=1)
+    smoothed = pd.DataFrame(seeded.T).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy().T
+    return smoothed[:, 1:]
+
+
+# Function to compute rolling mean and population std over the last window of each row
+def _rolling(values, window):
+    import pandas as pd
+
+    rolling = pd.DataFrame(values.T).rolling(window, min_periods=window)
+    return rolling.mean().to_numpy().T, rolling.std(ddof=0).to_numpy().T
+
+
+class _Buffer:
+    """Growable (n_series, n_obs) array; appends are amortized O(new columns)."""
+
+    def __init__(self, n_series, capacity=256):
+        self._data = np.full((n_series, capacity), np.nan)
+        self.n_obs = 0
+
+    def extend(self, block):
+        k = block.shape[1]
+        if self.n_obs + k > self._data.shape[1]:
+            grown = np.full((self._data.shape[0], max(2 * self._data.shape[1], self.n_obs + k)), np.nan)
+            grown[:, :self.n_obs] = self._data[:, :self.n_obs]
+            self._data = grown
+        self._data[:, self.n_obs:self.n_obs + k] = block
+        self.n_obs += k
+
+    @property
+    def values(self):
+        return self._data[:, :self.n_obs]
+
+
+class Indicators:
+    """SMA, EMA, RSI (Wilder), MACD and Bollinger bands for a block of aligned series.
+
+    Values are NaN until a series has enough bars for the indicator. Index an
+    instance by column name (``ind["rsi_14"]``) for a read-only
+    (n_series, n_obs) view.
+    """
+
+    def __init__(self, closes, sma=(20, 50), ema=(20,), rsi=14, macd=(12, 26, 9), bollinger=(20, 2.0)):
+        closes = _as_2d(closes)
+        n_series = closes.shape[0]
+        self.sma, self.ema, self.rsi, self.macd, self.bollinger = tuple(sma), tuple(ema), rsi, macd, bollinger
+
+        self.names = [f"sma_{n}" for n in self.sma] + [f"ema_{n}" for n in self.ema] + [f"rsi_{rsi}"]
+        self.names += ["macd", "macd_signal", "macd_hist", "bb_upper", "bb_mid", "bb_lower"]
+        self._columns = {name: _Buffer(n_series, max(256, closes.shape[1])) for name in self.names}
+
+        # Carried state: closes of the last rolling window, bars seen and every recursive average
+        self._tail = np.empty((n_series, 0))
+        self._seen = np.zeros(n_series, dtype=np.int64)
+        self._last_close = np.full(n_series, np.nan)
+        self._state = {key: np.full(n_series, np.nan) for key in
+                       [f"ema_{n}" for n in self.ema] + ["gain", "loss", "fast", "slow", "signal"]}
+        self.append(closes)
+
+    @property
+    def n_obs(self):
+        return self._columns[self.names[0]].n_obs
+
+    def __getitem__(self, name):
+        view = self._columns[name].values.view()
+        view.flags.writeable = False
+        return view
+
+    def _smooth(self, key, block, alpha):
+        smoothed = _ema(self._state[key], block, alpha)
+        self._state[key] = smoothed[:, -1]
+        return smoothed
+
+    # Function to add new bars to every series, closes shaped (n_series, k) or (k,) for a single series
+    def append(self, closes):
+        block = _as_2d(closes)
+        if block.shape[1] == 0:
+            return self
+        out = {}
+
+        # Bars seen per series up to and including each new bar, for the warm-up masks
+        seen = self._seen[:, np.newaxis] + np.cumsum(~np.isnan(block), axis=1)
+        self._seen = seen[:, -1]
+
+        k = block.shape[1]
+        window = np.concatenate([self._tail, block], axis=1)
+        for n in self.sma:
+            out[f"sma_{n}"] = _rolling(window, n)[0][:, -k:]
+        length, width = self.bollinger
+        mid, std = (part[:, -k:] for part in _rolling(window, length))
+        out["bb_mid"], out["bb_upper"], out["bb_lower"] = mid, mid + width * std, mid - width * std
+        keep = max(self.sma + (length,)) - 1
+        self._tail = window[:, window.shape[1] - keep:] if keep else window[:, :0]
+
+        for n in self.ema:
+            out[f"ema_{n}"] = np.where(seen >= n, self._smooth(f"ema_{n}", block, 2 / (n + 1)), np.nan)
+
+        delta = np.diff(np.concatenate([self._last_close[:, np.newaxis], block], axis=1), axis=1)
+        self._last_close = np.where(np.isnan(block[:, -1]), self._last_close, block[:, -1])
+        gain = self._smooth("gain", np.clip(delta, 0, None), 1 / self.rsi)
+        loss = self._smooth("loss", np.clip(-delta, 0, None), 1 / self.rsi)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+        out[f"rsi_{self.rsi}"] = np.where(seen > self.rsi, rsi, np.nan)
+
+        fast, slow, signal = self.macd
+        macd = self._smooth("fast", block, 2 / (fast + 1)) - self._smooth("slow", block, 2 / (slow + 1))
+        macd = np.where(seen >= slow, macd, np.nan)
+        macd_signal = np.where(seen >= slow + signal - 1, self._smooth("signal", macd, 2 / (signal + 1)), np.nan)
+        out["macd"], out["macd_signal"], out["macd_hist"] = macd, macd_signal, macd - macd_signal
+
+        for name in self.names:
+            self._columns[name].extend(out[name])
+        return self
+
+    # Function to return one series' indicators as a DataFrame on the given index
+    def frame(self, row=0, index=None):
+        import pandas as pd
+
+        return pd.DataFrame({name: self[name][row] for name in self.names}, index=index)
+
+
+# Function to align the closes of many frames onto their shared calendar, returns (index, symbols, closes)
+def align_closes(frames, column="Close"):
+    import pandas as pd
+
+    symbols = list(frames)
+    aligned = pd.concat({symbol: frames[symbol][column] for symbol in symbols}, axis=1, sort=True)
+    return aligned.index, symbols, aligned.to_numpy(dtype=np.float64).T
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# Function to return the indicator columns of one OHLCV frame, aligned to its index
+# With a key, e.g. (symbol, series type, interval), the state is kept so a refreshed
+# series only pays for its new bars; a rewritten history starts over
+def indicator_frame(df, key=None):
+    closes = df['Close'].to_numpy(dtype=np.float64)
+    if key is None:
+        return Indicators(closes).frame(index=df.index)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            indicators, index, last_close = cached
+            n = len(index)
+            extends = len(df) >= n and df.index[:n].equals(index) and closes[n - 1] == last_close
+        if cached is None or not extends:
+            indicators = Indicators(closes)
+        elif len(df) > n:
+            indicators.append(closes[n:])
+        _cache[key] = (indicators, df.index, closes[-1])
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+        return indicators.frame(index=df.index)
+
+
+# Function to add the given indicator columns to a copy of df, dropping the warm-up bars where any is missing
+def with_indicators(df, names, key=None):
+    indicators = indicator_frame(df, key)[list(names)]
+    return df.join(indicators)[indicators.notna().all(axis=1).to_numpy()]
+
+
+# Function to tell whether n_obs bars leave enough rows after the columns' warm-up to fit on,
+# at least twice the slowest warm-up; a shorter series would be fitted on a handful of rows or none
+def enough_history(n_obs, names):
+    warmup = max(WARMUP[name] for name in names)
+    return n_obs - warmup + 1 >= 2 * warmup
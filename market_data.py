@@ -0,0 +1,185 @@
+"""Process-wide plumbing behind the pages: the RapidAPI connection pool, the quota gate and the OHLCV cache.
+
+Streamlit executes the page script again on every rerun, so anything that has
+to outlive one run (kept-alive connections, the token bucket and single-flight
+map, the local series store, the prefetch thread, the metrics collectors) is created here, once per
+process, when the module is first imported. Pages only reference it.
+"""
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import metrics
+from connection_pool import ConnectionPool
+from data_processing import convert_to_dataframe, predict_trend
+from metrics import count_cache, count_error, span
+from ohlcv_cache import OHLCVCache
+from prefetch import Prefetcher, traffic
+from scheduler import RequestScheduler, ThrottledError
+
+# RapidAPI credentials
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "af4b7ada73msh7333fb00c727f70p195232jsne091685d1739")
+RAPIDAPI_HOST = "alpha-vantage.p.rapidapi.com"
+
+# Where requests go; point FINAGENT_API_URL at a local stand-in (such as the benchmark server) to run offline
+RAPIDAPI_URL = urlsplit(os.getenv("FINAGENT_API_URL", f"https://{RAPIDAPI_HOST}"))
+
+# Kept-alive connections to RapidAPI, reused across requests and sessions
+rapidapi_pool = ConnectionPool(
+    RAPIDAPI_URL.hostname,
+    port=RAPIDAPI_URL.port,
+    use_https=RAPIDAPI_URL.scheme == "https",
+    maxsize=int(os.getenv("FINAGENT_POOL_SIZE", "16")),
+)
+
+# Process-wide quota gate: merges identical in-flight calls and retries throttled ones
+request_scheduler = RequestScheduler(calls_per_minute=int(os.getenv("FINAGENT_CALLS_PER_MINUTE", "5")))
+
+# Local store of fetched series, shared by every session in this process
+ohlcv_cache = OHLCVCache(os.getenv("FINAGENT_CACHE_DIR", os.path.join(".cache", "ohlcv")))
+
+# Upstream calls made by each thread, so a caller can tell what a fetch actually spent
+_upstream = threading.local()
+
+# Scheduler queue and quota as gauges, and the /metrics endpoint when FINAGENT_METRICS_PORT is set
+metrics.registry.add_collector(lambda: [
+    (f"scheduler_{name}", {}, value) for name, value in request_scheduler.stats().items() if isinstance(value, (int, float))
+])
+metrics.start_server()
+
+
+def _time_series_key(time_series_type, interval):
+    if time_series_type == "Intraday":
+        return f"Time Series ({interval})"
+    elif time_series_type == "Weekly":
+        return "Weekly Time Series"
+    elif time_series_type == "Monthly":
+        return "Monthly Time Series"
+
+
+# Function to count the upstream calls this thread has made, retries included and merged calls excluded
+def upstream_calls():
+    return getattr(_upstream, "calls", 0)
+
+
+# Function to request one time series from RapidAPI, returns (time_series, error_message)
+def request_time_series(symbol, time_series_type, interval=None, outputsize="compact"):
+    if time_series_type == "Intraday":
+        endpoint = f"/query?function=TIME_SERIES_INTRADAY&symbol={symbol}&interval={interval}&outputsize={outputsize}&datatype=json"
+    elif time_series_type == "Weekly":
+        endpoint = f"/query?function=TIME_SERIES_WEEKLY&symbol={symbol}&outputsize={outputsize}&datatype=json"
+    elif time_series_type == "Monthly":
+        endpoint = f"/query?function=TIME_SERIES_MONTHLY&symbol={symbol}&outputsize={outputsize}&datatype=json"
+
+    headers = {
+        'x-rapidapi-key': RAPIDAPI_KEY,
+        'x-rapidapi-host': RAPIDAPI_HOST
+    }
+
+    def call():
+        _upstream.calls = upstream_calls() + 1
+        try:
+            with span("rapidapi_request", series=time_series_type, outputsize=outputsize):
+                status, data = rapidapi_pool.request("GET", endpoint, headers=headers)
+        except (http.client.HTTPException, OSError):
+            count_error("rapidapi", "connection")
+            return None, "Failed to fetch data from RapidAPI. Please try again later."
+
+        if status != 200:
+            count_error("rapidapi", "http_status")
+            return None, "Failed to fetch data from RapidAPI. Please try again later."
+
+        data_json = json.loads(data.decode("utf-8"))
+
+        if "Time Series" not in str(data_json.keys()):
+            if "Error Message" in data_json:
+                count_error("rapidapi", "error_message")
+                return None, f"API Error: {data_json['Error Message']}"
+            elif "Note" in data_json:
+                count_error("rapidapi", "note")
+                raise ThrottledError(data_json['Note'])
+            count_error("rapidapi", "unexpected")
+            return None, "Unexpected error. Please try again later."
+
+        return data_json.get(_time_series_key(time_series_type, interval)), None
+
+    try:
+        return request_scheduler.submit(endpoint, call)
+    except ThrottledError as exc:
+        return None, f"API Note: {exc}"
+
+
+# Function to fetch one series through the local cache, returns (time_series, error_message, stale)
+# force skips the freshness check, for the prefetcher refreshing on its own schedule
+def fetch_cached(symbol, time_series_type, interval=None, force=False):
+    entry = ohlcv_cache.get(symbol, time_series_type, interval)
+    if entry is not None and not force and ohlcv_cache.is_fresh(entry, time_series_type):
+        count_cache("ohlcv", "hit")
+        return entry["series"], None, False
+
+    # Deep history is pulled once, after that only the latest bars are merged in
+    outputsize = "compact" if entry is not None else "full"
+    time_series, error = request_time_series(symbol, time_series_type, interval, outputsize)
+    if time_series and outputsize == "compact" and ohlcv_cache.needs_full(entry, time_series):
+        full_series, _ = request_time_series(symbol, time_series_type, interval, "full")
+        time_series = full_series or time_series
+
+    if not time_series:
+        error = error or "No data returned. Please try again later."
+        if entry is not None:
+            count_cache("ohlcv", "stale")
+            return entry["series"], error, True
+        count_cache("ohlcv", "miss")
+        return None, error, False
+
+    count_cache("ohlcv", "refresh" if entry is not None else "miss")
+    return ohlcv_cache.update(symbol, time_series_type, interval, time_series), None, False
+
+
+# Function to fetch many symbols concurrently, yields (symbol, time_series, error_message) as each one finishes
+def fetch_many(symbols, time_series_type, interval=None, max_workers=None):
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return
+    for symbol in symbols:
+        traffic.record(symbol, time_series_type, interval)
+    executor = ThreadPoolExecutor(max_workers=max_workers or min(len(symbols), rapidapi_pool.maxsize))
+    try:
+        futures = {executor.submit(fetch_cached, symbol, time_series_type, interval): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            time_series, error, _ = future.result()
+            yield futures[future], time_series, error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Function to refresh one series for the prefetcher, returns (time_series, upstream calls made)
+def _prefetch_series(symbol, time_series_type, interval):
+    before = upstream_calls()
+    time_series = fetch_cached(symbol, time_series_type, interval, force=True)[0]
+    return time_series, upstream_calls() - before
+
+
+# Function to compute and cache one forecast for the prefetcher
+def _precompute_forecast(time_series, symbol, time_series_type, period, freq, engine, regressors=(), interval=None):
+    predict_trend(convert_to_dataframe(time_series), period, freq, symbol, time_series_type, engine,
+                  regressors=regressors, interval=interval)
+
+
+# Keeps the most requested series and their forecasts fresh in the background when FINAGENT_PREFETCH=1
+prefetcher = Prefetcher(
+    fetch=_prefetch_series,
+    forecast=_precompute_forecast,
+    cache=ohlcv_cache,
+    scheduler=request_scheduler,
+    top_n=int(os.getenv("FINAGENT_PREFETCH_TOP", "10")),
+    share=float(os.getenv("FINAGENT_PREFETCH_SHARE", "0.5")),
+)
+metrics.registry.add_collector(lambda: [
+    (f"prefetch_{name}", {}, value) for name, value in prefetcher.stats().items() if isinstance(value, (int, float))
+])
+if os.getenv("FINAGENT_PREFETCH") == "1":
+    prefetcher.start()
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+# Function to fingerprint the training data a model was fitted on
+def data_fingerprint(df):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(df.index.asi8.tobytes())
+    digest.update(df['Close'].to_numpy(dtype='float64').tobytes())
+    return digest.hexdigest()
+
+
+# Function to pull a fitted model's parameters for use as the init of the next fit
+def warm_start_params(model):
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = model.params[name][0][0]
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0]
+    return params
+
+
+class ModelCache:
+    """Bounded LRU of fitted Prophet models keyed by (symbol, series type, interval, data fingerprint).
+
+    When ``cache_dir`` is set every model is also written there as Prophet JSON,
+    along with the key of the latest model of each (symbol, series type,
+    interval), so a restarted process can pick up where it left off. ``latest``
+    returns that model to warm-start refits once new bars arrive.
+    """
+
+    def __init__(self, maxsize=32, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._models = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        name = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        from prophet.serialize import model_from_json
+
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return model_from_json(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, text):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _save(self, key, model):
+        from prophet.serialize import model_to_json
+
+        self._write(self._path(key), model_to_json(model))
+
+    # Function to read the key of the latest model written for a (symbol, series type, interval)
+    def _load_latest_key(self, latest):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(("latest",) + latest), encoding="utf-8") as f:
+                return tuple(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key):
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+
+        model = self._load(key)
+        with self._lock:
+            if model is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, model)
+        return model
+
+    def latest(self, symbol, series_type, interval=None):
+        with self._lock:
+            key = self._latest.get((symbol, series_type, interval))
+        if key is None:
+            key = self._load_latest_key((symbol, series_type, interval))
+            if key is None:
+                return None
+            with self._lock:
+                key = self._latest.setdefault((symbol, series_type, interval), key)
+        with self._lock:
+            model = self._models.get(key)
+        return model if model is not None else self._load(key)
+
+    def _remember(self, key, model):
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+
+    def put(self, key, model):
+        self._remember(key, model)
+        with self._lock:
+            self._latest[key[:3]] = key
+        if self.cache_dir:
+            self._save(key, model)
+            self._write(self._path(("latest",) + key[:3]), json.dumps(list(key)))
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._latest.clear()
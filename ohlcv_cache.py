@@ -0,0 +1,92 @@
+import json
+import os
+import re
+import threading
+import time
+
+# How long a cached series is served before asking the API for new bars
+SERIES_TTL = {
+    "Intraday": 5 * 60,
+    "Weekly": 6 * 60 * 60,
+    "Monthly": 12 * 60 * 60,
+}
+
+
+class OHLCVCache:
+    """On-disk store of Alpha Vantage time series keyed by (symbol, series type, interval).
+
+    Each key holds the merged bars from every response seen so far, so the deep
+    history is downloaded once (``outputsize=full``) and later refreshes only
+    merge the bars from ``compact`` responses. Entries are plain JSON files and
+    survive process restarts; a small in-memory layer avoids re-reading them on
+    every Streamlit rerun.
+    """
+
+    def __init__(self, cache_dir, ttl=None):
+        self.cache_dir = cache_dir
+        self.ttl = dict(SERIES_TTL, **(ttl or {}))
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, time_series_type, interval):
+        name = f"{symbol}_{time_series_type}_{interval or 'none'}"
+        return os.path.join(self.cache_dir, re.sub(r"[^A-Za-z0-9._-]", "_", name) + ".json")
+
+    def get(self, symbol, time_series_type, interval=None):
+        path = self._path(symbol, time_series_type, interval)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            self._entries[path] = (mtime, entry)
+        return entry
+
+    def is_fresh(self, entry, time_series_type):
+        return time.time() - entry["fetched_at"] < self.ttl.get(time_series_type, 0)
+
+    def needs_full(self, entry, time_series):
+        # A compact response that does not reach back to our newest bar leaves a gap
+        if entry is None or not entry["series"]:
+            return True
+        return min(time_series) > max(entry["series"])
+
+    def update(self, symbol, time_series_type, interval, time_series):
+        entry = self.get(symbol, time_series_type, interval)
+        merged = dict(entry["series"]) if entry is not None else {}
+        merged.update(time_series)
+
+        # Keep Alpha Vantage's newest-first ordering
+        series = {ts: merged[ts] for ts in sorted(merged, reverse=True)}
+        entry = {"fetched_at": time.time(), "series": series}
+
+        path = self._path(symbol, time_series_type, interval)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._entries[path] = (os.path.getmtime(path), entry)
+        return series
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
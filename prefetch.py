@@ -0,0 +1,194 @@
+import datetime
+import logging
+import threading
+import time
+from collections import deque
+from zoneinfo import ZoneInfo
+
+# Regular US equity session; exchange holidays are not modelled and only cost an extra refresh
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_SECONDS = {"1min": 60, "5min": 5 * 60, "15min": 15 * 60, "30min": 30 * 60, "60min": 60 * 60}
+
+
+def market_is_open(now=None):
+    local = datetime.datetime.fromtimestamp(now if now is not None else time.time(), MARKET_TZ)
+    return local.weekday() < 5 and MARKET_OPEN <= local.time() < MARKET_CLOSE
+
+
+# Function to return the epoch time of the most recent weekday close at or before now
+def last_close(now=None):
+    local = datetime.datetime.fromtimestamp(now if now is not None else time.time(), MARKET_TZ)
+    close = datetime.datetime.combine(local.date(), MARKET_CLOSE, MARKET_TZ)
+    if close > local:
+        close -= datetime.timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= datetime.timedelta(days=1)
+    return close.timestamp()
+
+
+class TrafficTracker:
+    """Exponentially decayed request counts per (symbol, series type, interval).
+
+    A request adds 1 to its key and older requests fade with ``half_life``, so
+    ``hot()`` follows what users are asking for now. The forecasts requested
+    for each key, with their regressors, are remembered too, so they can be
+    computed before they are asked for again.
+    """
+
+    def __init__(self, half_life=6 * 60 * 60, max_forecasts=3):
+        self.half_life = half_life
+        self.max_forecasts = max_forecasts
+        self._scores = {}
+        self._forecasts = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score, updated_at, now):
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def record(self, symbol, time_series_type, interval=None, now=None):
+        now = now if now is not None else time.time()
+        key = (symbol, time_series_type, interval)
+        with self._lock:
+            score, updated_at = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, updated_at, now) + 1.0, now)
+
+    def record_forecast(self, symbol, time_series_type, period, freq, engine, regressors=(), interval=None):
+        with self._lock:
+            specs = self._forecasts.setdefault((symbol, time_series_type, interval), [])
+            spec = (period, freq, engine, tuple(regressors))
+            if spec in specs:
+                specs.remove(spec)
+            specs.insert(0, spec)
+            del specs[self.max_forecasts:]
+
+    # Function to return the n hottest (key, score) pairs, hottest first
+    def hot(self, n=10, now=None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            scores = [(key, self._decayed(score, updated_at, now)) for key, (score, updated_at) in self._scores.items()]
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:n]
+
+    # Function to return the (period, freq, engine, regressors) specs asked for on a series, latest first
+    def forecasts(self, symbol, time_series_type, interval=None):
+        with self._lock:
+            return list(self._forecasts.get((symbol, time_series_type, interval), ()))
+
+
+# Requests seen by this process, fed by the front ends
+traffic = TrafficTracker()
+
+
+class Prefetcher:
+    """Background thread that keeps the hottest series fresh ahead of demand.
+
+    Intraday series are refreshed once per bar while the market is open and
+    once more after the close; weekly and monthly series once per trading day
+    after the close. Refreshes only spend tokens the request scheduler has to
+    spare, and at most ``share`` of the per-minute quota, so users are never
+    queued behind the prefetcher. After each refresh the forecasts users asked
+    for on that series are computed, so the next request is served from cache.
+
+    ``fetch(symbol, series_type, interval)`` must bypass the freshness check and
+    return the merged series with the number of upstream calls it made;
+    ``forecast(time_series, symbol, series_type, period, freq, engine,
+    regressors, interval)`` computes and caches one forecast.
+    """
+
+    def __init__(self, fetch, forecast, cache, scheduler, tracker=traffic, top_n=10, share=0.5, reserve=1, poll=30.0):
+        self.fetch = fetch
+        self.forecast = forecast
+        self.cache = cache
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.top_n = top_n
+        self.share = share
+        self.reserve = reserve
+        self.poll = poll
+
+        self._spent = deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshed = 0
+        self.forecasts = 0
+        self.skipped_budget = 0
+        self.errors = 0
+
+    # Function to decide whether a series has new bars worth a call
+    def due(self, symbol, time_series_type, interval, now=None):
+        now = now if now is not None else time.time()
+        entry = self.cache.get(symbol, time_series_type, interval)
+        if entry is None:
+            return True
+        fetched_at = entry["fetched_at"]
+
+        if time_series_type == "Intraday" and market_is_open(now):
+            return now - fetched_at >= INTERVAL_SECONDS.get(interval, 60)
+        return fetched_at < last_close(now)
+
+    def _budget_allows(self):
+        now = time.monotonic()
+        while self._spent and now - self._spent[0] >= 60:
+            self._spent.popleft()
+        if len(self._spent) >= max(1, int(self.scheduler.calls_per_minute * self.share)):
+            return False
+
+        stats = self.scheduler.stats()
+        return stats["queue_depth"] == 0 and stats["tokens_available"] >= 1 + self.reserve
+
+    # Function to refresh every hot series that is due, returns the keys refreshed
+    def run_once(self, now=None):
+        refreshed = []
+        for (symbol, time_series_type, interval), _ in self.tracker.hot(self.top_n, now):
+            if not self.due(symbol, time_series_type, interval, now):
+                continue
+            if not self._budget_allows():
+                self.skipped_budget += 1
+                break
+
+            time_series, calls = self.fetch(symbol, time_series_type, interval)
+            # A refresh can take two calls (latest bars, then full history across a gap) or none (merged in flight)
+            self._spent.extend([time.monotonic()] * calls)
+            if not time_series:
+                continue
+            self.refreshed += 1
+            refreshed.append((symbol, time_series_type, interval))
+
+            for period, freq, engine, regressors in self.tracker.forecasts(symbol, time_series_type, interval):
+                self.forecast(time_series, symbol, time_series_type, period, freq, engine, regressors, interval)
+                self.forecasts += 1
+        return refreshed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                self.errors += 1
+                logger.exception("prefetch pass failed")
+            self._stop.wait(self.poll)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="prefetcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "hot": [f"{symbol} {series_type} {interval or ''}".strip() for (symbol, series_type, interval), _ in self.tracker.hot(self.top_n)],
+            "refreshed": self.refreshed,
+            "forecasts": self.forecasts,
+            "skipped_budget": self.skipped_budget,
+            "errors": self.errors,
+        }
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+
+class ThrottledError(Exception):
+    """Raised by a request function when the upstream API asks us to slow down."""
+
+
+class RequestScheduler:
+    """Process-wide gate in front of a rate-limited API.
+
+    Identical requests that are already in flight share one upstream call
+    (single-flight), every upstream call takes a token from a calls-per-minute
+    bucket, and calls that come back throttled are retried with exponential
+    backoff. ``stats()`` reports queue depth and wait times.
+    """
+
+    def __init__(self, calls_per_minute=5, burst=None, max_retries=3, backoff=15.0, max_backoff=60.0):
+        self.calls_per_minute = calls_per_minute
+        self.capacity = burst or calls_per_minute
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._refilled_at = time.monotonic()
+        self._in_flight = {}
+
+        self.waiting = 0
+        self.calls = 0
+        self.deduplicated = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        rate = self.calls_per_minute / 60.0
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    def _acquire(self):
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    self._refill()
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    delay = (1 - self._tokens) * 60.0 / self.calls_per_minute
+                time.sleep(delay)
+        finally:
+            waited = time.monotonic() - started
+            with self._lock:
+                self.waiting -= 1
+                self.calls += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+    def _run(self, fn):
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            try:
+                return fn()
+            except ThrottledError:
+                with self._lock:
+                    self.throttled += 1
+                    # The upstream quota is shared, so nobody else should spend a token right now either
+                    self._tokens = min(self._tokens, 0.0)
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.8, 1.2))
+
+    def submit(self, key, fn):
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run(fn)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            self._refill()
+            return {
+                "queue_depth": self.waiting,
+                "in_flight": len(self._in_flight),
+                "tokens_available": round(self._tokens, 2),
+                "calls": self.calls,
+                "deduplicated": self.deduplicated,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "avg_wait_seconds": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+                "max_wait_seconds": round(self.max_wait, 3),
+            }
@@ -0,0 +1,104 @@
+"""Startup-time report and optional warm-up for the Streamlit server.
+
+    python startup.py                     # print the import / warm-up breakdown
+    python startup.py --json              # same, machine-readable
+    python startup.py --serve app.py      # warm up in this process, then run Streamlit
+
+``--serve`` runs Streamlit inside the warmed process, so the first session
+finds Prophet already imported and its Stan model loaded and executed once.
+Set FINAGENT_WARMUP=0 to skip the warm-up and start straight away.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+# Heavy modules in dependency order, so each time is the extra cost on top of the ones before it
+HEAVY_MODULES = ["numpy", "pandas", "streamlit", "plotly.graph_objs", "prophet"]
+
+
+def time_imports(modules):
+    timings = {}
+    for name in modules:
+        if name in sys.modules:
+            timings[name] = 0.0
+            continue
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+# Function to load and run everything that is slow the first time, returns per-step timings
+def warm_up():
+    import numpy as np
+    import pandas as pd
+
+    timings = {}
+    history = pd.DataFrame(
+        {"Close": 100 + np.cumsum(np.sin(np.arange(60)))},
+        index=pd.date_range("2024-01-01", periods=60, freq="D"),
+    )
+
+    # Loads the cmdstan backend and runs the compiled Stan model once
+    started = time.perf_counter()
+    from data_processing import fit_model
+    model = fit_model(history)
+    model.predict(model.make_future_dataframe(periods=1))
+    timings["prophet_fit"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    from data_processing import forecast_frame
+    for engine in ("ols", "holt", "seasonal_naive"):
+        forecast_frame(history, 1, "D", engine=engine)
+    timings["numpy_engines"] = time.perf_counter() - started
+
+    # plotly imports its trace validators on the first figure, not at import time
+    started = time.perf_counter()
+    import plotly.graph_objs as go
+    go.Figure(go.Scatter(x=history.index, y=history["Close"]))
+    timings["plotly_figure"] = time.perf_counter() - started
+    return timings
+
+
+def startup_report(app_module=None, warm=True):
+    started = time.perf_counter()
+    report = {"imports": time_imports(HEAVY_MODULES + ([app_module] if app_module else []))}
+    report["warmup"] = warm_up() if warm else {}
+    report["total"] = time.perf_counter() - started
+    return report
+
+
+def print_report(report):
+    for section in ("imports", "warmup"):
+        for name, seconds in report[section].items():
+            print(f"{section:<8} {name:<20} {seconds * 1000:9.1f} ms")
+    print(f"{'total':<29} {report['total'] * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time report and warm-up for the Streamlit server.")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--no-warmup", action="store_true", help="only time the imports")
+    parser.add_argument("--app", default="app", help="front-end module to include in the import timings")
+    parser.add_argument("--serve", metavar="SCRIPT", help="run this Streamlit script after warming up")
+    args, streamlit_args = parser.parse_known_args()
+
+    warm = not args.no_warmup and os.getenv("FINAGENT_WARMUP", "1") != "0"
+    report = startup_report(None if args.serve else args.app, warm=warm)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.serve:
+        from streamlit.web import cli as stcli
+
+        sys.argv = ["streamlit", "run", args.serve, *streamlit_args]
+        sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
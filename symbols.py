@@ -0,0 +1,240 @@
+import bisect
+import csv
+import itertools
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+# Symbol master file: one listing per row with Symbol and Name columns
+SYMBOLS_PATH = os.getenv("FINAGENT_SYMBOLS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbols.csv"))
+
+# Matches shown for a search box query
+SEARCH_LIMIT = 10
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Function to compute the edit distance with adjacent transpositions, giving up once it exceeds limit
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class _SortedTerms:
+    """Sorted (term, listing) pairs; the listings under a prefix are one contiguous slice."""
+
+    def __init__(self, pairs, position):
+        pairs = sorted(pairs)
+        self.terms = [term for term, _ in pairs]
+        self.ids = np.array([i for _, i in pairs], dtype=np.int64)
+        self.positions = position[self.ids] if len(self.ids) else self.ids
+
+    # Listings whose term starts with prefix, best-ranked first, at most limit of them
+    def prefixed(self, prefix, limit):
+        start = bisect.bisect_left(self.terms, prefix)
+        stop = bisect.bisect_left(self.terms, prefix + "\uffff", start)
+        if stop - start > limit:
+            best = np.argpartition(self.positions[start:stop], limit - 1)[:limit]
+        else:
+            best = np.arange(stop - start)
+        best = best[np.argsort(self.positions[start:stop][best], kind="stable")]
+        return self.ids[start:stop][best]
+
+
+class SymbolIndex:
+    """Search over company names and tickers: prefix, substring and typo-tolerant.
+
+    Tickers, names and the words inside names are kept sorted, so a prefix is a
+    binary search to one slice. Substrings go through a trigram index over the
+    names, and typos are matched against the vocabulary of distinct words, not
+    every listing. Only a one- or two-character query, too short for a trigram,
+    scans the listings for a substring, in rank order. Results come in
+    match-kind order (exact ticker, exact name, ticker prefix, name prefix, word
+    prefix, substring, typo), shorter names first within a kind, and the search
+    stops as soon as k listings are found.
+    """
+
+    def __init__(self, listings):
+        self.names = []
+        self.symbols = []
+        seen = set()
+        for symbol, name in listings:
+            symbol, name = str(symbol).strip().upper(), str(name).strip()
+            if not symbol or not name or symbol in seen:
+                continue
+            seen.add(symbol)
+            self.symbols.append(symbol)
+            self.names.append(name)
+
+        self.mapping = dict(zip(self.names, self.symbols))
+        self._keys = [normalize(name) for name in self.names]
+
+        # Rank of every listing within a match kind: shorter names first, then alphabetical
+        order = sorted(range(len(self.names)), key=lambda i: (len(self.names[i]), self.names[i]))
+        self._order = np.array(order, dtype=np.int64)
+        self._position = np.empty(len(order), dtype=np.int64)
+        self._position[order] = np.arange(len(order))
+
+        self._by_symbol = {symbol.lower(): i for i, symbol in enumerate(self.symbols)}
+        self._by_name = {}
+        for i, key in enumerate(self._keys):
+            self._by_name.setdefault(key, i)
+
+        self._symbol_terms = _SortedTerms(((symbol.lower(), i) for i, symbol in enumerate(self.symbols)), self._position)
+        self._name_terms = _SortedTerms(((key, i) for i, key in enumerate(self._keys)), self._position)
+        self._word_terms = _SortedTerms(
+            ((word, i) for i, key in enumerate(self._keys) for word in key.split()[1:]), self._position
+        )
+
+        self._name_grams = {}
+        for i, key in enumerate(self._keys):
+            for gram in _trigrams(key):
+                self._name_grams.setdefault(gram, set()).add(i)
+
+        # Distinct words and tickers, each with the ranks of the listings that contain it
+        vocabulary = {}
+        for i, key in enumerate(self._keys):
+            for term in set(key.split()) | {self.symbols[i].lower()}:
+                vocabulary.setdefault(term, []).append(self._position[i])
+        self._vocabulary = list(vocabulary)
+        self._vocabulary_positions = [np.sort(np.array(positions, dtype=np.int64)) for positions in vocabulary.values()]
+        self._vocabulary_grams = {}
+        for t, term in enumerate(self._vocabulary):
+            for gram in _trigrams(term):
+                self._vocabulary_grams.setdefault(gram, []).append(t)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    # Listings containing the query, best-ranked first; candidates are checked lazily in rank order
+    def _substring(self, query):
+        grams = _trigrams(query)
+        if not grams:
+            # Too short for a trigram: scan names and tickers in rank order until the caller has enough
+            ticker = query.replace(" ", "").upper()
+            for i in self._order:
+                if query in self._keys[i] or ticker in self.symbols[i]:
+                    yield i
+            return
+        postings = sorted((self._name_grams.get(gram, set()) for gram in grams), key=len)
+        candidates = np.fromiter(set.intersection(*postings), dtype=np.int64)
+        for i in self._order[np.sort(self._position[candidates])]:
+            if query in self._keys[i]:
+                yield i
+
+    # Ranks of the listings with a term within limit edits of word (or of its start, for partial words)
+    def _fuzzy_word(self, word, limit, max_candidates=64):
+        counts = Counter()
+        for gram in _trigrams(word):
+            counts.update(self._vocabulary_grams.get(gram, ()))
+
+        # Terms too short to be within limit edits are skipped before they crowd out real candidates
+        candidates = (t for t, _ in counts.most_common() if len(self._vocabulary[t]) >= len(word) - limit)
+        by_distance = {}
+        for t in itertools.islice(candidates, max_candidates):
+            term = self._vocabulary[t]
+            distance = min(edit_distance(word, term, limit), edit_distance(word, term[:len(word)], limit))
+            if distance <= limit:
+                by_distance.setdefault(distance, []).append(self._vocabulary_positions[t])
+        return {distance: np.unique(np.concatenate(ranks)) for distance, ranks in by_distance.items()}
+
+    # Function to group typo matches by edit distance, best-ranked listings first within a group
+    def _fuzzy(self, query):
+        words = query.split()
+        if len(words) == 1:
+            groups = self._fuzzy_word(query, max(1, len(query) // 4))
+            return [self._order[groups[distance]] for distance in sorted(groups)]
+
+        # Every word of a multi-word query has to match some term of the listing
+        ranks = None
+        for word in words:
+            groups = self._fuzzy_word(word, len(word) // 4)
+            matched = np.unique(np.concatenate(list(groups.values()))) if groups else np.empty(0, dtype=np.int64)
+            ranks = matched if ranks is None else np.intersect1d(ranks, matched, assume_unique=True)
+        return [self._order[ranks]]
+
+    # Function to return the k best (name, symbol) matches for a query
+    def search(self, query, k=10):
+        query = normalize(query)
+        if not query or k <= 0:
+            return []
+        ticker = query.replace(" ", "")
+        found = []
+        seen = set()
+
+        def take(ids):
+            for i in ids:
+                i = int(i)
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+                    if len(found) == k:
+                        return True
+            return False
+
+        kinds = (
+            lambda: [self._by_symbol[ticker]] if ticker in self._by_symbol else [],
+            lambda: [self._by_name[query]] if query in self._by_name else [],
+            lambda: self._symbol_terms.prefixed(ticker, k + len(seen)),
+            lambda: self._name_terms.prefixed(query, k + len(seen)),
+            lambda: self._word_terms.prefixed(query, k + len(seen)),
+            lambda: self._substring(query),
+        )
+        for kind in kinds:
+            if take(kind()):
+                break
+        else:
+            # Typo tolerance only for queries long enough to tell a typo from a different word
+            if len(query) >= 4:
+                for ids in self._fuzzy(query):
+                    if take(ids):
+                        break
+
+        return [(self.names[i], self.symbols[i]) for i in found]
+
+
+# Function to read (symbol, name) pairs from the symbol master CSV
+def load_listings(path=SYMBOLS_PATH):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["Symbol"], row["Name"]) for row in csv.DictReader(f)]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Function to build the index once per process, rebuilt only when the symbol file changes
+def get_symbol_index(path=SYMBOLS_PATH):
+    version = os.path.getmtime(path)
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    index = SymbolIndex(load_listings(path))
+    with _indexes_lock:
+        _indexes[path] = (version, index)
+    return index
@@ -1,15 +1,105 @@
-import plotly.graph_objs as go
 import streamlit as st
+from downsample import MAX_POINTS, WEBGL_THRESHOLD, downsample
+from indicators import GROUPS, OSCILLATORS, indicator_frame
+from metrics import span
 
-def plot_stock_data(df, symbol):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df.index, y=df['Close'], mode='lines', name=f'Close Price of {symbol}', line=dict(color='cyan')))
-    fig.add_trace(go.Scatter(x=df.index, y=df['Open'], mode='lines', name=f'Open Price of {symbol}', line=dict(color='green')))
-    fig.update_layout(
-        title=f'Stock Price of {symbol} Over Time',
-        xaxis_title='Date',
-        yaxis_title='Price',
-        hovermode='x',
-        xaxis_rangeslider_visible=False
-    )
-    st.plotly_chart(fig)
+# Function to pick the date range to draw; long series get a range slider so zooming in
+# re-resolves the detail from the full data instead of stretching the downsampled points
+def select_range(df, key, max_points=MAX_POINTS):
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    first, last = df.index[0].to_pydatetime(), df.index[-1].to_pydatetime()
+    start, end = st.slider("Zoom", min_value=first, max_value=last, value=(first, last), key=f'{key}_zoom')
+    return df.loc[start:end]
+
+# Indicators are GROUPS names from the indicators module; oscillators (RSI, MACD) get a row each
+# below the price. cache_key, e.g. (symbol, series type, interval), lets a refreshed series
+# reuse the indicator state of the bars it already had
+def plot_stock_data(df, symbol, key=None, template=None, max_points=MAX_POINTS, method="lttb", indicators=(), cache_key=None):
+    import plotly.graph_objs as go
+
+    view = select_range(df, key or symbol, max_points)
+    with span("plot"):
+        oscillators = [group for group in OSCILLATORS if group in indicators]
+        if oscillators:
+            from plotly.subplots import make_subplots
+            fig = make_subplots(rows=1 + len(oscillators), cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                                row_heights=[0.6] + [0.4 / len(oscillators)] * len(oscillators))
+        else:
+            fig = go.Figure()
+
+        def add_line(x, y, name, row=1, **line):
+            x, y = downsample(x, y, max_points, method)
+            trace = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+            fig.add_trace(trace(x=x, y=y, mode='lines', name=name, line=line), **(dict(row=row, col=1) if oscillators else {}))
+            return len(x)
+
+        shown = 0
+        for column, name, color in (('Close', f'Close Price of {symbol}', 'cyan'), ('Open', f'Open Price of {symbol}', 'green')):
+            shown = max(shown, add_line(view.index.to_numpy(), view[column].to_numpy(), name, color=color))
+
+        if indicators:
+            values = indicator_frame(df, cache_key).loc[view.index[0]:view.index[-1]]
+            for group in indicators:
+                row = 2 + oscillators.index(group) if group in oscillators else 1
+                for column in GROUPS[group]:
+                    # Skip the warm-up bars, the downsampler needs finite values
+                    series = values[column].dropna()
+                    if len(series):
+                        add_line(series.index.to_numpy(), series.to_numpy(), column, row=row, width=1)
+
+        fig.update_layout(
+            title=f'Stock Price of {symbol} Over Time',
+            xaxis_title='Date',
+            yaxis_title='Price',
+            hovermode='x',
+            xaxis_rangeslider_visible=False
+        )
+        if template:
+            fig.update_layout(template=template)
+        st.plotly_chart(fig)
+    if shown < len(view):
+        st.caption(f"Showing {shown:,} of {len(view):,} points")
+    return fig
+
+# Function to draw a forecast over the recent history; only the last context bars
+# (at least three times the horizon) are drawn so a short horizon stays visible
+def plot_forecast(df, result, symbol, template=None, context=None, max_points=MAX_POINTS):
+    import plotly.graph_objs as go
+
+    with span("plot", chart="forecast"):
+        context = context or max(120, 3 * len(result))
+        recent = df.iloc[-context:]
+        x, y = downsample(recent.index.to_numpy(), recent['Close'].to_numpy(), max_points)
+        trace = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+
+        fig = go.Figure()
+        fig.add_trace(trace(x=x, y=y, mode='lines', name=f'Close Price of {symbol}', line=dict(color='cyan')))
+        fig.add_trace(go.Scatter(x=result.ds, y=result.yhat_upper, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=result.ds, y=result.yhat_lower, mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor='rgba(255, 165, 0, 0.2)', name='Forecast interval'))
+        fig.add_trace(go.Scatter(x=result.ds, y=result.yhat, mode='lines+markers', name='Forecast', line=dict(color='orange', dash='dash')))
+        fig.update_layout(
+            title=f'Forecast for {symbol} ({result.engine})',
+            xaxis_title='Date',
+            yaxis_title='Price',
+            hovermode='x',
+        )
+        if template:
+            fig.update_layout(template=template)
+        st.plotly_chart(fig)
+    return fig
+
+# Function to draw a correlation matrix as a heatmap, -1 to 1 on a diverging scale
+def plot_correlation(corr, labels, template=None):
+    import plotly.graph_objs as go
+
+    with span("plot", chart="correlation"):
+        fig = go.Figure(go.Heatmap(z=corr, x=labels, y=labels, zmin=-1, zmax=1, colorscale='RdBu', reversescale=True,
+                                   text=[[f"{value:.2f}" for value in row] for row in corr], texttemplate="%{text}"))
+        fig.update_layout(title='Return Correlation', yaxis_autorange='reversed')
+        if template:
+            fig.update_layout(template=template)
+        st.plotly_chart(fig)
+    return fig